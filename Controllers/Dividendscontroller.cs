@@ -13,6 +13,9 @@ namespace FinanceApi.Controllers
         private readonly DividendDbContext _dbContext;
         private readonly ILogger<DividendsController> _logger;
 
+        // Each uncached symbol in a batch runs the Python fetcher in turn, so cap the request size
+        private const int MaxBatchSymbols = 100;
+
         public DividendsController(
             DividendAnalysisService dividendService,
             DividendDbContext dbContext,
@@ -140,6 +143,76 @@ namespace FinanceApi.Controllers
             });
         }
 
+        /// <summary>
+        /// Analyze several stocks in one request (used by the bulk import scripts)
+        /// Symbols already in the database are skipped unless refresh=true
+        /// Example: POST /api/dividends/analyze/batch with body { "symbols": ["AAPL", "MSFT"] }
+        /// </summary>
+        [HttpPost("analyze/batch")]
+        public async Task<ActionResult<object>> AnalyzeBatch([FromBody] BatchAnalyzeRequest request, [FromQuery] bool refresh = false)
+        {
+            var symbols = (request?.Symbols ?? new())
+                .Where(s => !string.IsNullOrWhiteSpace(s))
+                .Select(s => s.Trim().ToUpper())
+                .Distinct()
+                .ToList();
+
+            if (symbols.Count == 0)
+            {
+                return BadRequest(new { error = "At least one symbol is required" });
+            }
+
+            if (symbols.Count > MaxBatchSymbols)
+            {
+                return BadRequest(new { error = $"At most {MaxBatchSymbols} symbols per batch (got {symbols.Count})" });
+            }
+
+            // One query for the whole batch instead of one lookup per symbol
+            var cachedSymbols = refresh
+                ? new HashSet<string>()
+                : (await _dbContext.DividendModels
+                    .Where(d => symbols.Contains(d.Symbol))
+                    .Select(d => d.Symbol)
+                    .ToListAsync()).ToHashSet();
+
+            var results = new List<object>();
+            foreach (var symbol in symbols)
+            {
+                if (cachedSymbols.Contains(symbol))
+                {
+                    results.Add(new { symbol, success = true, cached = true });
+                    continue;
+                }
+
+                try
+                {
+                    var success = await _dividendService.FetchStockDataViaPythonAsync(symbol);
+
+                    if (!success)
+                    {
+                        _logger.LogWarning($"✗ Python script failed for {symbol}, trying Alpha Vantage fallback...");
+                        var alphaAnalysis = await _dividendService.GetDividendAnalysisAsync(symbol, forceRefresh: true, preferYahoo: false);
+                        success = alphaAnalysis != null;
+                    }
+
+                    results.Add(success
+                        ? (object)new { symbol, success = true, cached = false }
+                        : new { symbol, success = false, error = $"Could not analyze {symbol} from either data source" });
+                }
+                catch (Exception ex)
+                {
+                    _logger.LogError($"Batch analysis failed for {symbol}: {ex.Message}");
+                    results.Add(new { symbol, success = false, error = ex.Message });
+                }
+            }
+
+            return Ok(new
+            {
+                total = symbols.Count,
+                results
+            });
+        }
+
         /// <summary>
         /// Get historical chart data for dividend analysis
         /// Returns multi-year trends for charts
@@ -735,4 +808,9 @@ namespace FinanceApi.Controllers
     {
         public string Symbol { get; set; } = string.Empty;
     }
+
+    public class BatchAnalyzeRequest
+    {
+        public List<string> Symbols { get; set; } = new();
+    }
 }
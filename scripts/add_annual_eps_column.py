@@ -2,47 +2,80 @@
 """
 Simple script to add AnnualEPS column to YearlyDividends table
 """
+import atexit
+import functools
 import sqlite3
 import sys
-import os
+import pathlib
+
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent
+DB_PATH = str(SCRIPT_DIR.parent / 'dividends.db')
+
+# Detailed listings only when someone is watching (or -v); keeps CI logs short
+VERBOSE = sys.stdout.isatty() or '-v' in sys.argv
+DEBUG = '--debug' in sys.argv
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+@functools.lru_cache(maxsize=1)
+def _conn():
+    """Shared autocommit connection, reused if imported by a larger bootstrap"""
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    # WAL lets the backend keep reading while we migrate; busy_timeout
+    # retries on lock contention instead of failing immediately
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    if DEBUG:
+        conn.set_trace_callback(print)
+    atexit.register(conn.close)
+    return conn
 
-DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
 
 def add_column():
     print("Adding AnnualEPS column to YearlyDividends table...")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        cursor = _conn().cursor()
 
-        # Check if column already exists
-        cursor.execute('PRAGMA table_info(YearlyDividends)')
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
+        # Check if column already exists (filter inside SQLite, no column list needed)
+        cursor.execute("SELECT 1 FROM pragma_table_info('YearlyDividends') WHERE name=? LIMIT 1", ('AnnualEPS',))
 
-        if 'AnnualEPS' in column_names:
+        if cursor.fetchone() is not None:
             print("Column AnnualEPS already exists!")
-            conn.close()
             return True
 
         # Add the column
         cursor.execute('ALTER TABLE YearlyDividends ADD COLUMN AnnualEPS REAL')
-        conn.commit()
+
+        # Let SQLite re-ANALYZE the altered table if its heuristics say so
+        cursor.execute('PRAGMA optimize')
+
+        # Fold the WAL back into the main file now rather than on the first read
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        busy, log_frames, checkpointed = cursor.fetchone()
+        if busy:
+            print(f"WARNING: WAL checkpoint was partial ({checkpointed}/{log_frames} frames), a reader is still active")
 
         print("SUCCESS: AnnualEPS column added successfully!")
 
-        # Verify
-        cursor.execute('PRAGMA table_info(YearlyDividends)')
-        columns = cursor.fetchall()
-        print("\nCurrent columns in YearlyDividends:")
-        for col in columns:
-            print(f"  - {col[1]} ({col[2]})")
+        # Verify (only on the add path; the common already-exists path skips this)
+        if VERBOSE:
+            cursor.execute("SELECT name, type FROM pragma_table_info('YearlyDividends')")
+            columns = cursor.fetchall()
+            print("\nCurrent columns in YearlyDividends:")
+            sys.stdout.write('\n'.join(f"  - {col[0]} ({col[1]})" for col in columns) + '\n')
 
-        conn.close()
         return True
 
     except sqlite3.OperationalError as e:
-        if 'database is locked' in str(e):
+        # Match on the SQLite result code rather than formatting the message;
+        # sqlite_errorcode is the extended code (e.g. BUSY_SNAPSHOT), so mask it
+        errorcode = getattr(e, 'sqlite_errorcode', None)
+        if ((errorcode is not None and errorcode & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED))
+                or (errorcode is None and e.args and 'locked' in e.args[0])):
             print("\nERROR: Database is locked!")
             print("Please STOP your backend server first, then run this script again.")
             return False
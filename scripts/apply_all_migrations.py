@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Apply all schema migrations (AnnualEPS column + commodity tables) in one pass.
+
+Equivalent to running add_annual_eps_column.py followed by
+apply_commodity_schema.py, but uses a single connection and a single
+write transaction, so there is one commit/fsync instead of two.
+"""
+
+import os
+import sqlite3
+import sys
+
+from apply_commodity_schema import DB_PATH, SQL_FILE, _INSTALL_PRAGMAS, _conn, _defer_indexes, _read_sql_script
+
+
+def main():
+    if not os.path.exists(DB_PATH):
+        print(f"Error: Database not found at {DB_PATH}")
+        sys.exit(1)
+
+    if not os.path.exists(SQL_FILE):
+        print(f"Error: SQL file not found at {SQL_FILE}")
+        sys.exit(1)
+
+    print(f"Connecting to database: {DB_PATH}")
+
+    try:
+        # Same connection setup (WAL, busy_timeout, --debug trace) and SQL read
+        # as apply_commodity_schema.py
+        cursor = _conn().cursor()
+        sql_script, digest = _read_sql_script()
+
+        # 1. AnnualEPS column (only if missing)
+        cursor.execute("SELECT 1 FROM pragma_table_info('YearlyDividends') WHERE name=? LIMIT 1", ('AnnualEPS',))
+        add_eps = cursor.fetchone() is None
+        ddl = []
+        if add_eps:
+            ddl.append('ALTER TABLE YearlyDividends ADD COLUMN AnnualEPS REAL;')
+
+        # 2. Commodity tables (only if this exact script has not been applied)
+        cursor.execute("CREATE TABLE IF NOT EXISTS _schema_applied (hash TEXT PRIMARY KEY, applied_at TEXT)")
+        cursor.execute("SELECT 1 FROM _schema_applied WHERE hash=?", (digest,))
+        apply_commodity = cursor.fetchone() is None
+        if apply_commodity:
+            ddl.append(_defer_indexes(sql_script))
+
+        if not ddl:
+            print("[SUCCESS] All migrations already applied, nothing to do")
+            return
+
+        if apply_commodity:
+            ddl.append(f"INSERT INTO _schema_applied VALUES ('{digest}', datetime('now'));")
+
+        # Single write transaction for everything
+        print("Applying migrations...")
+        cursor.executescript(_INSTALL_PRAGMAS + "BEGIN IMMEDIATE;\n" + "\n".join(ddl) + "\nCOMMIT;")
+
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA foreign_key_check")
+        violations = cursor.fetchall()
+        if violations:
+            print(f"[ERROR] Foreign key check failed: {violations}")
+            sys.exit(1)
+
+        # Refresh planner statistics for the touched tables
+        cursor.execute("PRAGMA optimize")
+
+        # Fold the WAL back into the main file now rather than on the first read
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        busy, log_frames, checkpointed = cursor.fetchone()
+        if busy:
+            print(f"[WARNING] WAL checkpoint was partial ({checkpointed}/{log_frames} frames), a reader is still active")
+
+        if add_eps:
+            print("[SUCCESS] AnnualEPS column added to YearlyDividends")
+        if apply_commodity:
+            print("[SUCCESS] Created commodity trading tables and seeded CME cost profiles")
+
+    except sqlite3.Error as e:
+        print(f"[ERROR] SQLite error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"[ERROR] Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,87 @@
 Apply commodity trading tables to the SQLite database
 """
 
+import atexit
+import functools
+import hashlib
+import mmap
 import sqlite3
 import os
+import pathlib
+import re
 import sys
 
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent
+DB_PATH = str(SCRIPT_DIR.parent / 'dividends.db')
+SQL_FILE = str(SCRIPT_DIR / 'create_commodity_tables.sql')
+
+# Detailed listings only when someone is watching (or -v); keeps CI logs short
+VERBOSE = sys.stdout.isatty() or '-v' in sys.argv
+DEBUG = '--debug' in sys.argv
+
+# Transaction control inside the SQL file would nest inside our own BEGIN
+_TXN_STMT = re.compile(r'^\s*(BEGIN(\s+\w+)?(\s+TRANSACTION)?|COMMIT(\s+TRANSACTION)?|END(\s+TRANSACTION)?)\s*;',
+                       re.IGNORECASE | re.MULTILINE)
+
+_CREATE_INDEX = re.compile(r'^CREATE\s+(UNIQUE\s+)?INDEX\b', re.IGNORECASE)
+_SQL_COMMENT = re.compile(r'^\s*--[^\n]*\n?', re.MULTILINE)
+
+
+def _defer_indexes(sql_script):
+    """
+    Reorder the script so CREATE INDEX statements run after all tables and
+    seed INSERTs. Indexes are then built once from the loaded rows instead of
+    being updated row by row.
+    """
+    statements, indexes, buf = [], [], ''
+    for line in sql_script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = _SQL_COMMENT.sub('', buf).strip()
+            if stmt:
+                (indexes if _CREATE_INDEX.match(stmt) else statements).append(stmt)
+            buf = ''
+    if buf.strip():
+        statements.append(buf.strip())
+    return '\n'.join(statements + indexes)
+
+# Connection settings for the install window. foreign_keys must be set
+# outside a transaction to take effect; integrity is checked after COMMIT.
+_INSTALL_PRAGMAS = """PRAGMA cache_size=-65536;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA foreign_keys=OFF;
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _conn():
+    """Shared autocommit connection, reused if imported by a larger bootstrap"""
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    # WAL lets the backend keep reading while we migrate; busy_timeout
+    # retries on lock contention instead of failing immediately
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if DEBUG:
+        conn.set_trace_callback(print)
+    atexit.register(conn.close)
+    return conn
+
+def _read_sql_script(sql_file=SQL_FILE):
+    """
+    The schema script with its own transaction control stripped, plus the
+    content hash recorded in _schema_applied
+    """
+    # (mapped read + one decode avoids the text-mode read buffer copy)
+    with open(sql_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        sql_script = _TXN_STMT.sub('', mm[:].decode('utf-8'))
+    return sql_script, hashlib.blake2b(sql_script.encode(), digest_size=16).hexdigest()
+
 def main():
     # Database path
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
-    sql_file = os.path.join(os.path.dirname(__file__), 'create_commodity_tables.sql')
+    db_path = DB_PATH
+    sql_file = SQL_FILE
 
     if not os.path.exists(db_path):
         print(f"Error: Database not found at {db_path}")
@@ -24,32 +97,53 @@ def main():
 
     try:
         # Connect to database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = _conn().cursor()
 
         # Read SQL file
-        with open(sql_file, 'r') as f:
-            sql_script = f.read()
+        sql_script, digest = _read_sql_script(sql_file)
+
+        # Skip the whole parse/execute pass if this exact script was already applied
+        cursor.execute("CREATE TABLE IF NOT EXISTS _schema_applied (hash TEXT PRIMARY KEY, applied_at TEXT)")
+        cursor.execute("SELECT 1 FROM _schema_applied WHERE hash=?", (digest,))
+        if cursor.fetchone() is not None:
+            print("[SUCCESS] Commodity schema already applied, nothing to do")
+            return
 
-        # Execute SQL script
+        # Execute SQL script as one write transaction (single fsync at COMMIT).
+        # BEGIN/COMMIT go inside the script because executescript() commits any
+        # transaction that is already open before it runs. (digest is hex-only.)
         print("Executing SQL script...")
-        cursor.executescript(sql_script)
+        cursor.executescript(
+            f"{_INSTALL_PRAGMAS}BEGIN IMMEDIATE;\n{_defer_indexes(sql_script)}\n"
+            f"INSERT INTO _schema_applied VALUES ('{digest}', datetime('now'));\nCOMMIT;"
+        )
 
-        # Commit changes
-        conn.commit()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA foreign_key_check")
+        violations = cursor.fetchall()
+        if violations:
+            print(f"[ERROR] Foreign key check failed: {violations}")
+            sys.exit(1)
+
+        # Refresh planner statistics for the new tables/indexes
+        cursor.execute("PRAGMA optimize")
+
+        # Fold the WAL back into the main file now rather than on the first read
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        busy, log_frames, checkpointed = cursor.fetchone()
+        if busy:
+            print(f"[WARNING] WAL checkpoint was partial ({checkpointed}/{log_frames} frames), a reader is still active")
 
         print("[SUCCESS] Successfully created commodity trading tables!")
         print("[SUCCESS] Seeded default CME cost profiles")
 
         # Verify tables were created
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%Commodit%' OR name LIKE '%Backtest%' OR name LIKE '%Cme%';")
-        tables = cursor.fetchall()
-
-        print(f"\nCreated tables:")
-        for table in tables:
-            print(f"  - {table[0]}")
+        if VERBOSE:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND (name GLOB 'Commodit*' OR name GLOB 'Backtest*' OR name GLOB 'Cme*') ORDER BY name;")
+            tables = cursor.fetchall()
 
-        conn.close()
+            print(f"\nCreated tables:")
+            sys.stdout.write('\n'.join(f"  - {table[0]}" for table in tables) + '\n')
 
     except sqlite3.Error as e:
         print(f"[ERROR] SQLite error: {e}")
@@ -14,6 +14,13 @@ import numpy as np
 from datetime import datetime, timedelta
 import sqlite3
 import os
+import functools
+from indicators import calculate_atr, njit
+from json_output import write_json
+from price_cache import load_history
+
+# Trade sides (shared constants, so side checks compare the same string object)
+BUY, SELL = 'BUY', 'SELL'
 
 # Technical indicator calculations
 def calculate_sma(prices, period):
@@ -24,11 +31,19 @@ def calculate_ema(prices, period):
     """Calculate Exponential Moving Average"""
     return prices.ewm(span=period, adjust=False).mean()
 
+def calculate_wilder_ma(values, period):
+    """
+    Calculate Wilder's moving average (EWM with alpha = 1/period, seeded from
+    the first value), as used for RSI. ATR comes from indicators.calculate_atr,
+    which seeds with the SMA of the first `period` true ranges
+    """
+    return values.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
 def calculate_rsi(prices, period=14):
-    """Calculate Relative Strength Index"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    """Calculate Relative Strength Index (Wilder smoothing)"""
+    delta = prices.diff().to_numpy()
+    gain = calculate_wilder_ma(pd.Series(np.where(delta > 0, delta, 0.0), index=prices.index), period)
+    loss = calculate_wilder_ma(pd.Series(np.where(delta < 0, -delta, 0.0), index=prices.index), period)
     rs = gain / loss
     rsi = 100 - (100 / (1 + rs))
     return rsi
@@ -41,23 +56,50 @@ def calculate_macd(prices, fast=12, slow=26, signal=9):
     signal_line = calculate_ema(macd_line, signal)
     return macd_line, signal_line
 
+@njit(cache=True)
+def _bollinger_nb(x, period, std_dev):
+    """
+    Rolling mean and sample std in one pass (Welford add/remove updates, as
+    pandas rolling var does); NaN until the window holds `period` values
+    """
+    n = x.size
+    upper = np.full(n, np.nan)
+    middle = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    for i in range(n):
+        val = x[i]
+        if val == val:
+            nobs += 1
+            delta = val - mean
+            mean += delta / nobs
+            ssqdm += (nobs - 1) * delta * delta / nobs
+        if i >= period:
+            old = x[i - period]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    delta = old - mean
+                    mean -= delta / nobs
+                    ssqdm -= (nobs + 1) * delta * delta / nobs
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        if nobs == period:
+            var = ssqdm / (nobs - 1)
+            std = np.sqrt(var) if var > 0.0 else 0.0
+            middle[i] = mean
+            upper[i] = mean + std * std_dev
+            lower[i] = mean - std * std_dev
+    return upper, middle, lower
+
 def calculate_bollinger_bands(prices, period=20, std_dev=2):
     """Calculate Bollinger Bands"""
-    sma = calculate_sma(prices, period)
-    std = prices.rolling(window=period).std()
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    return upper_band, sma, lower_band
-
-def calculate_atr(df, period=14):
-    """Calculate Average True Range"""
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift())
-    low_close = np.abs(df['Low'] - df['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(period).mean()
-    return atr
+    upper_band, sma, lower_band = _bollinger_nb(prices.to_numpy(dtype=np.float64), period, float(std_dev))
+    index = prices.index
+    return pd.Series(upper_band, index=index), pd.Series(sma, index=index), pd.Series(lower_band, index=index)
 
 def calculate_volatility(prices, period=20):
     """Calculate historical volatility (annualized)"""
@@ -66,8 +108,9 @@ def calculate_volatility(prices, period=20):
     return volatility
 
 # Get commodity contract specifications
+@functools.lru_cache(maxsize=256)
 def get_commodity_specs(symbol):
-    """Get commodity contract specifications"""
+    """Get commodity contract specifications (cached per symbol; treat as read-only)"""
     specs = {
         'GC=F': {'name': 'Gold', 'contractSize': 100, 'tickSize': 0.10, 'tickValue': 10.00, 'margin': 8000},
         'SI=F': {'name': 'Silver', 'contractSize': 5000, 'tickSize': 0.005, 'tickValue': 25.00, 'margin': 6000},
@@ -80,36 +123,36 @@ def get_commodity_specs(symbol):
     return specs.get(symbol, {'name': symbol, 'contractSize': 1, 'tickSize': 0.01, 'tickValue': 1.00, 'margin': 5000})
 
 # Get CME cost profile from database
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
+_db_conn = None
+
+def _get_db_conn():
+    """Shared read-only connection (opened once per process)"""
+    global _db_conn
+    if _db_conn is None:
+        # mode=ro: don't create an empty database if it is missing
+        _db_conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True, check_same_thread=False)
+        _db_conn.execute('PRAGMA query_only=ON')
+    return _db_conn
+
+@functools.lru_cache(maxsize=256)
 def get_cme_costs(symbol):
-    """Get CME broker costs from database"""
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
-
+    """Get CME broker costs from database (cached per symbol; treat as read-only)"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = _get_db_conn().cursor()
 
-        # Try to get symbol-specific costs first
+        # Symbol-specific costs first, falling back to the 'ALL' default, in one query
         cursor.execute("""
             SELECT CommissionPerContract, ExchangeFeePerContract, ClearingFeePerContract,
                    OvernightFinancingRate, MarginInterestRate
             FROM CmeCostProfiles
-            WHERE CommoditySymbol = ? AND IsActive = 1
+            WHERE CommoditySymbol IN (?, 'ALL') AND IsActive = 1
+            ORDER BY CommoditySymbol = 'ALL'
+            LIMIT 1
         """, (symbol,))
 
         result = cursor.fetchone()
 
-        # If not found, get default costs
-        if not result:
-            cursor.execute("""
-                SELECT CommissionPerContract, ExchangeFeePerContract, ClearingFeePerContract,
-                       OvernightFinancingRate, MarginInterestRate
-                FROM CmeCostProfiles
-                WHERE CommoditySymbol = 'ALL' AND IsActive = 1
-            """)
-            result = cursor.fetchone()
-
-        conn.close()
-
         if result:
             return {
                 'commission': float(result[0]),
@@ -130,50 +173,75 @@ def get_cme_costs(symbol):
         'marginRate': 0.05
     }
 
-# Calculate stop-loss price
-def calculate_stop_loss(entry_price, method, value, atr=None, volatility=None, direction='long'):
-    """Calculate stop-loss price based on method"""
-    if method == 'atr' and atr is not None:
-        stop_distance = float(value) * atr
-        return entry_price - stop_distance if direction == 'long' else entry_price + stop_distance
+@functools.lru_cache(maxsize=256)
+def _get_ticker(symbol):
+    """One yf.Ticker per symbol per process, so repeated fetches reuse its session state"""
+    return yf.Ticker(symbol)
 
-    elif method == 'percentage':
-        percentage = float(value) / 100
-        return entry_price * (1 - percentage) if direction == 'long' else entry_price * (1 + percentage)
+def load_prices(symbol, start_date, end_date):
+    """Daily OHLCV history for symbol, cached on disk per (symbol, start day, end day)"""
+    return load_history(_get_ticker(symbol), start_date, end_date)
 
-    elif method == 'volatility' and volatility is not None:
-        # Volatility-adjusted: entry ± (multiplier × volatility)
-        vol_distance = entry_price * (float(value) * volatility / 100 / 100)
-        return entry_price - vol_distance if direction == 'long' else entry_price + vol_distance
+# Stop-loss method codes for the compiled kernels (no strings in nopython mode)
+STOP_LOSS_CODES = {'atr': 0, 'percentage': 1, 'volatility': 2, 'fixed': 3}
 
-    elif method == 'fixed':
+# Calculate stop-loss price
+@njit(cache=True)
+def _stop_loss_nb(entry_price, method_code, value, atr, volatility, long):
+    """Stop-loss price for a STOP_LOSS_CODES method; NaN means no stop"""
+    if method_code == 0:
+        stop_distance = value * atr
+        return entry_price - stop_distance if long else entry_price + stop_distance
+    elif method_code == 1:
+        percentage = value / 100
+        return entry_price * (1 - percentage) if long else entry_price * (1 + percentage)
+    elif method_code == 2:
+        # Volatility-adjusted: entry ± (multiplier × volatility)
+        vol_distance = entry_price * (value * volatility / 100 / 100)
+        return entry_price - vol_distance if long else entry_price + vol_distance
+    elif method_code == 3:
         # Fixed dollar amount
-        return entry_price - float(value) if direction == 'long' else entry_price + float(value)
+        return entry_price - value if long else entry_price + value
+    return np.nan
 
-    return None
+def calculate_stop_loss(entry_price, method, value, atr=None, volatility=None, direction='long'):
+    """Calculate stop-loss price based on method (None if there is no stop)"""
+    stop_price = _stop_loss_nb(float(entry_price), STOP_LOSS_CODES.get(method, -1), float(value),
+                               np.nan if atr is None else float(atr),
+                               np.nan if volatility is None else float(volatility),
+                               direction == 'long')
+    return None if np.isnan(stop_price) else stop_price
 
 # Trading strategies
-def strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_value):
+def strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=None):
     """Buy and hold strategy"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
+    # Loop-invariant cost and contract parameters
+    cost_per_contract = costs['commission'] + costs['exchangeFee'] + costs['clearingFee']
+    margin = specs['margin']
+    contract_size = specs['contractSize']
+    overnight_rate = costs['overnightRate']
+
     trades = []
+    close = ind['Close']
 
     # Buy on first day
-    entry_price = df['Close'].iloc[0]
-    contracts = int(capital / specs['margin'])
+    entry_price = close[0]
+    contracts = int(capital / margin)
 
     if contracts < 1:
         return [], 0, capital
 
     # Calculate stop-loss
-    atr = df['ATR14'].iloc[0] if 'ATR14' in df.columns else None
-    vol = df['Volatility20'].iloc[0] if 'Volatility20' in df.columns else None
+    atr = ind['ATR14'][0]
+    vol = ind['Volatility20'][0]
     stop_price = calculate_stop_loss(entry_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
 
     # Entry trade
-    entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
+    entry_costs = cost_per_contract * contracts
     trades.append({
         'date': df.index[0].strftime('%Y-%m-%d'),
-        'type': 'BUY',
+        'type': BUY,
         'price': float(entry_price),
         'contracts': contracts,
         'reason': 'Initial entry',
@@ -186,60 +254,30 @@ def strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_val
         'overnightFinancing': 0
     })
 
-    position_value = entry_price * specs['contractSize'] * contracts
-    remaining_capital = capital - (specs['margin'] * contracts) - entry_costs
-    stop_hit = False
-    days_held = 0
-
-    # Hold until end or stop-loss
-    for i in range(1, len(df)):
-        current_price = df['Close'].iloc[i]
-        days_held += 1
-
-        # Check stop-loss
-        if stop_price and current_price <= stop_price:
-            # Stop-loss hit
-            exit_price = stop_price
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-            overnight_costs = specs['margin'] * contracts * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - entry_price) * specs['contractSize'] * contracts
-            total_costs = entry_costs + exit_costs + overnight_costs
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': contracts,
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            final_value = remaining_capital + (specs['margin'] * contracts) + pnl - total_costs
-            stop_hit = True
-            break
-
-    # If didn't hit stop-loss, close at end
-    if not stop_hit:
-        exit_price = df['Close'].iloc[-1]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-        overnight_costs = specs['margin'] * contracts * costs['overnightRate'] * days_held
-
-        pnl = (exit_price - entry_price) * specs['contractSize'] * contracts
+    remaining_capital = capital - (margin * contracts) - entry_costs
+    # First bar after entry that closes at or below the stop, in one vectorized scan
+    hit_idx = None
+    if stop_price:
+        hits = close[1:] <= stop_price
+        if hits.any():
+            hit_idx = int(np.argmax(hits)) + 1
+
+    if hit_idx is not None:
+        # Stop-loss hit; days held counts bars since entry
+        days_held = hit_idx
+        exit_price = stop_price
+        exit_costs = cost_per_contract * contracts
+        overnight_costs = margin * contracts * overnight_rate * days_held
+
+        pnl = (exit_price - entry_price) * contract_size * contracts
         total_costs = entry_costs + exit_costs + overnight_costs
 
         trades.append({
-            'date': df.index[-1].strftime('%Y-%m-%d'),
-            'type': 'SELL',
+            'date': df.index[hit_idx].strftime('%Y-%m-%d'),
+            'type': SELL,
             'price': float(exit_price),
             'contracts': contracts,
-            'reason': 'End of period',
+            'reason': 'Stop-loss triggered',
             'stopLossPrice': None,
             'takeProfitPrice': None,
             'pnl': float(pnl),
@@ -249,139 +287,23 @@ def strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_val
             'overnightFinancing': float(overnight_costs)
         })
 
-        final_value = remaining_capital + (specs['margin'] * contracts) + pnl - total_costs
-
-    total_costs_sum = sum(t.get('commission', 0) + t.get('overnightFinancing', 0) for t in trades)
-
-    return trades, total_costs_sum, final_value
+        final_value = remaining_capital + (margin * contracts) + pnl - total_costs
 
-def strategy_sma_crossover(df, capital, specs, costs, stop_loss_method, stop_loss_value):
-    """SMA Crossover Strategy (50/200)"""
-    df = df.copy()
-    df['SMA50'] = calculate_sma(df['Close'], 50)
-    df['SMA200'] = calculate_sma(df['Close'], 200)
+    else:
+        # Didn't hit stop-loss, close at end
+        days_held = len(close) - 1
+        exit_price = close[-1]
+        exit_costs = cost_per_contract * contracts
+        overnight_costs = margin * contracts * overnight_rate * days_held
 
-    trades = []
-    position = None
-    remaining_capital = capital
-    total_costs = 0
-
-    # Wait for SMA200 to be valid
-    start_idx = 200
-
-    for i in range(start_idx, len(df)):
-        current_price = df['Close'].iloc[i]
-        sma50 = df['SMA50'].iloc[i]
-        sma200 = df['SMA200'].iloc[i]
-        sma50_prev = df['SMA50'].iloc[i-1]
-        sma200_prev = df['SMA200'].iloc[i-1]
-
-        # Entry: SMA50 crosses above SMA200
-        if position is None and sma50 > sma200 and sma50_prev <= sma200_prev:
-            contracts = int(remaining_capital / specs['margin'])
-            if contracts >= 1:
-                atr = df['ATR14'].iloc[i] if 'ATR14' in df.columns else None
-                vol = df['Volatility20'].iloc[i] if 'Volatility20' in df.columns else None
-                stop_price = calculate_stop_loss(current_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
-
-                entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-
-                position = {
-                    'entry_price': current_price,
-                    'entry_date': df.index[i],
-                    'contracts': contracts,
-                    'stop_price': stop_price,
-                    'entry_costs': entry_costs
-                }
-
-                trades.append({
-                    'date': df.index[i].strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(current_price),
-                    'contracts': contracts,
-                    'reason': 'SMA50 crossed above SMA200',
-                    'stopLossPrice': float(stop_price) if stop_price else None,
-                    'takeProfitPrice': None,
-                    'pnl': None,
-                    'commission': entry_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': 0
-                })
-
-                remaining_capital -= (specs['margin'] * contracts) + entry_costs
-                total_costs += entry_costs
-
-        # Check stop-loss
-        elif position and position['stop_price'] and current_price <= position['stop_price']:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_price = position['stop_price']
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': position['contracts'],
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-        # Exit: SMA50 crosses below SMA200
-        elif position and sma50 < sma200 and sma50_prev >= sma200_prev:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(current_price),
-                'contracts': position['contracts'],
-                'reason': 'SMA50 crossed below SMA200',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-    # Close any open position at end
-    if position:
-        i = len(df) - 1
-        days_held = (df.index[i] - position['entry_date']).days
-        current_price = df['Close'].iloc[i]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-        overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-        pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
+        pnl = (exit_price - entry_price) * contract_size * contracts
+        total_costs = entry_costs + exit_costs + overnight_costs
 
         trades.append({
-            'date': df.index[i].strftime('%Y-%m-%d'),
-            'type': 'SELL',
-            'price': float(current_price),
-            'contracts': position['contracts'],
+            'date': df.index[-1].strftime('%Y-%m-%d'),
+            'type': SELL,
+            'price': float(exit_price),
+            'contracts': contracts,
             'reason': 'End of period',
             'stopLossPrice': None,
             'takeProfitPrice': None,
@@ -392,609 +314,311 @@ def strategy_sma_crossover(df, capital, specs, costs, stop_loss_method, stop_los
             'overnightFinancing': float(overnight_costs)
         })
 
-        remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-        total_costs += exit_costs + overnight_costs
+        final_value = remaining_capital + (margin * contracts) + pnl - total_costs
 
-    final_value = remaining_capital
-    return trades, total_costs, final_value
+    total_costs_sum = sum(t.get('commission', 0) + t.get('overnightFinancing', 0) for t in trades)
 
-def strategy_rsi(df, capital, specs, costs, stop_loss_method, stop_loss_value, oversold=30, overbought=70):
-    """RSI Strategy (30/70 thresholds)"""
-    df = df.copy()
-    df['RSI'] = calculate_rsi(df['Close'], 14)
+    return trades, total_costs_sum, final_value
 
-    trades = []
-    position = None
-    remaining_capital = capital
-    total_costs = 0
+def _crossings(series, level):
+    """
+    Boolean masks (crossed_above, crossed_below) of bars where series crosses
+    level (scalar or array), from the sign of their difference computed once
+    """
+    side = np.sign(series - level)
+    crossed_above = np.zeros(len(side), dtype=bool)
+    crossed_below = np.zeros(len(side), dtype=bool)
+    crossed_above[1:] = (side[1:] > 0) & (side[:-1] <= 0)
+    crossed_below[1:] = (side[1:] < 0) & (side[:-1] >= 0)
+    return crossed_above, crossed_below
 
-    # Wait for RSI to be valid
-    start_idx = 14
-
-    for i in range(start_idx, len(df)):
-        current_price = df['Close'].iloc[i]
-        rsi = df['RSI'].iloc[i]
-        rsi_prev = df['RSI'].iloc[i-1]
-
-        # Entry: RSI crosses above oversold level
-        if position is None and rsi > oversold and rsi_prev <= oversold:
-            contracts = int(remaining_capital / specs['margin'])
-            if contracts >= 1:
-                atr = df['ATR14'].iloc[i] if 'ATR14' in df.columns else None
-                vol = df['Volatility20'].iloc[i] if 'Volatility20' in df.columns else None
-                stop_price = calculate_stop_loss(current_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
-
-                entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-
-                position = {
-                    'entry_price': current_price,
-                    'entry_date': df.index[i],
-                    'contracts': contracts,
-                    'stop_price': stop_price,
-                    'entry_costs': entry_costs
-                }
-
-                trades.append({
-                    'date': df.index[i].strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(current_price),
-                    'contracts': contracts,
-                    'reason': f'RSI crossed above {oversold} (oversold)',
-                    'stopLossPrice': float(stop_price) if stop_price else None,
-                    'takeProfitPrice': None,
-                    'pnl': None,
-                    'commission': entry_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': 0
-                })
-
-                remaining_capital -= (specs['margin'] * contracts) + entry_costs
-                total_costs += entry_costs
-
-        # Check stop-loss
-        elif position and position['stop_price'] and current_price <= position['stop_price']:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_price = position['stop_price']
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': position['contracts'],
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-        # Exit: RSI crosses below overbought level
-        elif position and rsi < overbought and rsi_prev >= overbought:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(current_price),
-                'contracts': position['contracts'],
-                'reason': f'RSI crossed below {overbought} (overbought)',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-    # Close any open position at end
-    if position:
-        i = len(df) - 1
-        days_held = (df.index[i] - position['entry_date']).days
-        current_price = df['Close'].iloc[i]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-        overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-        pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
+# Exit kinds reported by _position_kernel
+EXIT_SIGNAL, EXIT_STOP, EXIT_END = 0, 1, 2
 
-        trades.append({
-            'date': df.index[i].strftime('%Y-%m-%d'),
-            'type': 'SELL',
-            'price': float(current_price),
-            'contracts': position['contracts'],
-            'reason': 'End of period',
-            'stopLossPrice': None,
-            'takeProfitPrice': None,
-            'pnl': float(pnl),
-            'commission': exit_costs,
-            'exchangeFees': 0,
-            'clearingFees': 0,
-            'overnightFinancing': float(overnight_costs)
-        })
+DAY_NS = 86_400_000_000_000
 
-        remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-        total_costs += exit_costs + overnight_costs
+def _index_ns(df):
+    """Bar timestamps as int64 nanoseconds; (a - b) // DAY_NS equals Timedelta.days"""
+    return df.index.values.astype('datetime64[ns]').astype(np.int64)
 
-    final_value = remaining_capital
-    return trades, total_costs, final_value
+@njit(cache=True)
+def _position_kernel(close, entry_idx, exit_idx, atr, vol, day_ns, capital, margin, contract_size,
+                     cost_per_contract, overnight_rate, method_code, stop_value):
+    """
+    Long-only position state machine over precomputed entry/exit signal indices.
 
-def strategy_macd(df, capital, specs, costs, stop_loss_method, stop_loss_value):
-    """MACD Crossover Strategy"""
-    df = df.copy()
-    macd_line, signal_line = calculate_macd(df['Close'])
-    df['MACD'] = macd_line
-    df['Signal'] = signal_line
+    Jumps from one entry candidate to the next; while in a position the exit
+    is the earlier of the next exit signal and the first stop-loss hit (stop
+    wins on the same bar). Returns per-trade columns plus running totals.
+    """
+    n = close.shape[0]
+    m = entry_idx.shape[0]
+    t_entry = np.empty(m, np.int64)
+    t_exit = np.empty(m, np.int64)
+    t_kind = np.empty(m, np.int64)
+    t_contracts = np.empty(m, np.int64)
+    t_stop = np.empty(m, np.float64)
+    t_exit_price = np.empty(m, np.float64)
+    t_entry_costs = np.empty(m, np.float64)
+    t_exit_costs = np.empty(m, np.float64)
+    t_overnight = np.empty(m, np.float64)
+    t_pnl = np.empty(m, np.float64)
 
-    trades = []
-    position = None
     remaining_capital = capital
-    total_costs = 0
+    total_costs = 0.0
+    n_trades = 0
+    k = 0
+    while k < m:
+        i = entry_idx[k]
+        contracts = int(remaining_capital / margin)
+        if contracts < 1:
+            # Capital only changes when a trade closes, so no later entry can fill either
+            break
 
-    # Wait for MACD to be valid
-    start_idx = 26
-
-    for i in range(start_idx, len(df)):
-        current_price = df['Close'].iloc[i]
-        macd = df['MACD'].iloc[i]
-        signal = df['Signal'].iloc[i]
-        macd_prev = df['MACD'].iloc[i-1]
-        signal_prev = df['Signal'].iloc[i-1]
-
-        # Entry: MACD crosses above Signal
-        if position is None and macd > signal and macd_prev <= signal_prev:
-            contracts = int(remaining_capital / specs['margin'])
-            if contracts >= 1:
-                atr = df['ATR14'].iloc[i] if 'ATR14' in df.columns else None
-                vol = df['Volatility20'].iloc[i] if 'Volatility20' in df.columns else None
-                stop_price = calculate_stop_loss(current_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
-
-                entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-
-                position = {
-                    'entry_price': current_price,
-                    'entry_date': df.index[i],
-                    'contracts': contracts,
-                    'stop_price': stop_price,
-                    'entry_costs': entry_costs
-                }
-
-                trades.append({
-                    'date': df.index[i].strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(current_price),
-                    'contracts': contracts,
-                    'reason': 'MACD crossed above Signal',
-                    'stopLossPrice': float(stop_price) if stop_price else None,
-                    'takeProfitPrice': None,
-                    'pnl': None,
-                    'commission': entry_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': 0
-                })
-
-                remaining_capital -= (specs['margin'] * contracts) + entry_costs
-                total_costs += entry_costs
-
-        # Check stop-loss
-        elif position and position['stop_price'] and current_price <= position['stop_price']:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_price = position['stop_price']
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': position['contracts'],
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-        # Exit: MACD crosses below Signal
-        elif position and macd < signal and macd_prev >= signal_prev:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(current_price),
-                'contracts': position['contracts'],
-                'reason': 'MACD crossed below Signal',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-    # Close any open position at end
-    if position:
-        i = len(df) - 1
-        days_held = (df.index[i] - position['entry_date']).days
-        current_price = df['Close'].iloc[i]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-        overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-        pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
+        entry_price = close[i]
+        stop_price = _stop_loss_nb(entry_price, method_code, stop_value, atr[i], vol[i], True)
+        entry_costs = cost_per_contract * contracts
+        remaining_capital -= (margin * contracts) + entry_costs
+        total_costs += entry_costs
+
+        # Next exit signal after entry (n if none left)
+        e = np.searchsorted(exit_idx, i, side='right')
+        exit_i = exit_idx[e] if e < exit_idx.shape[0] else n
+
+        # First stop-loss hit up to and including the exit signal bar
+        stop_i = n
+        if stop_price != 0.0:
+            hits = close[i + 1:exit_i + 1] <= stop_price
+            if hits.any():
+                stop_i = i + 1 + np.argmax(hits)
+
+        if stop_i < n:
+            j = stop_i
+            exit_price = stop_price
+            kind = EXIT_STOP
+        elif exit_i < n:
+            j = exit_i
+            exit_price = close[j]
+            kind = EXIT_SIGNAL
+        else:
+            j = n - 1
+            exit_price = close[j]
+            kind = EXIT_END
+
+        days_held = (day_ns[j] - day_ns[i]) // DAY_NS
+        exit_costs = cost_per_contract * contracts
+        overnight_costs = margin * contracts * overnight_rate * days_held
+        pnl = (exit_price - entry_price) * contract_size * contracts
+        remaining_capital += (margin * contracts) + pnl - exit_costs - overnight_costs
+        total_costs += exit_costs + overnight_costs
 
+        t_entry[n_trades] = i
+        t_exit[n_trades] = j
+        t_kind[n_trades] = kind
+        t_contracts[n_trades] = contracts
+        t_stop[n_trades] = stop_price
+        t_exit_price[n_trades] = exit_price
+        t_entry_costs[n_trades] = entry_costs
+        t_exit_costs[n_trades] = exit_costs
+        t_overnight[n_trades] = overnight_costs
+        t_pnl[n_trades] = pnl
+        n_trades += 1
+
+        if kind == EXIT_END:
+            break
+        # Resume with the first entry signal after the exit bar
+        k = np.searchsorted(entry_idx, j, side='right')
+
+    return (n_trades, t_entry, t_exit, t_kind, t_contracts, t_stop, t_exit_price,
+            t_entry_costs, t_exit_costs, t_overnight, t_pnl, remaining_capital, total_costs)
+
+def _run_signal_strategy(df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+                         entry_signal, exit_signal, start_idx, entry_reason, exit_reason):
+    """
+    Run the shared position kernel for a signal strategy and build the trade
+    records. Entry/exit signals are precomputed boolean arrays; the reasons
+    are either strings or per-bar string arrays indexed by the entry bar.
+    """
+    entry_signal[:start_idx] = False
+    exit_signal[:start_idx] = False
+
+    (n_trades, t_entry, t_exit, t_kind, t_contracts, t_stop, t_exit_price,
+     t_entry_costs, t_exit_costs, t_overnight, t_pnl, final_value, total_costs) = _position_kernel(
+        ind['Close'],
+        np.flatnonzero(entry_signal),
+        np.flatnonzero(exit_signal),
+        ind['ATR14'], ind['Volatility20'],
+        _index_ns(df),
+        float(capital),
+        float(specs['margin']),
+        float(specs['contractSize']),
+        costs['commission'] + costs['exchangeFee'] + costs['clearingFee'],
+        costs['overnightRate'],
+        STOP_LOSS_CODES.get(stop_loss_method, -1),
+        float(stop_loss_value))
+
+    # Convert the trade columns in bulk, then zip them into records once
+    t_entry, t_exit = t_entry[:n_trades], t_exit[:n_trades]
+    entry_dates = df.index[t_entry].strftime('%Y-%m-%d')
+    exit_dates = df.index[t_exit].strftime('%Y-%m-%d')
+    entry_prices = ind['Close'][t_entry].tolist()
+    stop_prices = [p if p and p == p else None for p in t_stop[:n_trades].tolist()]
+    entry_reasons = [entry_reason] * n_trades if isinstance(entry_reason, str) else entry_reason[t_entry].tolist()
+    signal_reasons = [exit_reason] * n_trades if isinstance(exit_reason, str) else exit_reason[t_entry].tolist()
+    exit_reasons = {EXIT_STOP: 'Stop-loss triggered', EXIT_END: 'End of period'}
+
+    trades = []
+    for (entry_date, exit_date, entry_price, stop_price, contracts, kind, exit_price,
+         entry_costs, exit_costs, overnight_costs, pnl, entry_reason, signal_reason) in zip(
+            entry_dates, exit_dates, entry_prices, stop_prices,
+            t_contracts[:n_trades].tolist(), t_kind[:n_trades].tolist(),
+            t_exit_price[:n_trades].tolist(), t_entry_costs[:n_trades].tolist(),
+            t_exit_costs[:n_trades].tolist(), t_overnight[:n_trades].tolist(), t_pnl[:n_trades].tolist(),
+            entry_reasons, signal_reasons):
         trades.append({
-            'date': df.index[i].strftime('%Y-%m-%d'),
-            'type': 'SELL',
-            'price': float(current_price),
-            'contracts': position['contracts'],
-            'reason': 'End of period',
-            'stopLossPrice': None,
+            'date': entry_date,
+            'type': BUY,
+            'price': entry_price,
+            'contracts': contracts,
+            'reason': entry_reason,
+            'stopLossPrice': stop_price,
             'takeProfitPrice': None,
-            'pnl': float(pnl),
-            'commission': exit_costs,
+            'pnl': None,
+            'commission': entry_costs,
             'exchangeFees': 0,
             'clearingFees': 0,
-            'overnightFinancing': float(overnight_costs)
+            'overnightFinancing': 0
         })
-
-        remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-        total_costs += exit_costs + overnight_costs
-
-    final_value = remaining_capital
-    return trades, total_costs, final_value
-
-def strategy_bollinger(df, capital, specs, costs, stop_loss_method, stop_loss_value):
-    """Bollinger Bands Mean Reversion Strategy"""
-    df = df.copy()
-    upper, middle, lower = calculate_bollinger_bands(df['Close'])
-    df['BB_Upper'] = upper
-    df['BB_Middle'] = middle
-    df['BB_Lower'] = lower
-
-    trades = []
-    position = None
-    remaining_capital = capital
-    total_costs = 0
-
-    # Wait for Bollinger Bands to be valid
-    start_idx = 20
-
-    for i in range(start_idx, len(df)):
-        current_price = df['Close'].iloc[i]
-        bb_lower = df['BB_Lower'].iloc[i]
-        bb_middle = df['BB_Middle'].iloc[i]
-        bb_upper = df['BB_Upper'].iloc[i]
-
-        # Entry: Price touches or breaks below lower band
-        if position is None and current_price <= bb_lower:
-            contracts = int(remaining_capital / specs['margin'])
-            if contracts >= 1:
-                atr = df['ATR14'].iloc[i] if 'ATR14' in df.columns else None
-                vol = df['Volatility20'].iloc[i] if 'Volatility20' in df.columns else None
-                stop_price = calculate_stop_loss(current_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
-
-                entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-
-                position = {
-                    'entry_price': current_price,
-                    'entry_date': df.index[i],
-                    'contracts': contracts,
-                    'stop_price': stop_price,
-                    'entry_costs': entry_costs
-                }
-
-                trades.append({
-                    'date': df.index[i].strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(current_price),
-                    'contracts': contracts,
-                    'reason': 'Price touched lower Bollinger Band',
-                    'stopLossPrice': float(stop_price) if stop_price else None,
-                    'takeProfitPrice': None,
-                    'pnl': None,
-                    'commission': entry_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': 0
-                })
-
-                remaining_capital -= (specs['margin'] * contracts) + entry_costs
-                total_costs += entry_costs
-
-        # Check stop-loss
-        elif position and position['stop_price'] and current_price <= position['stop_price']:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_price = position['stop_price']
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': position['contracts'],
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-        # Exit: Price returns to middle band
-        elif position and current_price >= bb_middle:
-            days_held = (df.index[i] - position['entry_date']).days
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': df.index[i].strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(current_price),
-                'contracts': position['contracts'],
-                'reason': 'Price returned to middle band',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-    # Close any open position at end
-    if position:
-        i = len(df) - 1
-        days_held = (df.index[i] - position['entry_date']).days
-        current_price = df['Close'].iloc[i]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-        overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-        pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
         trades.append({
-            'date': df.index[i].strftime('%Y-%m-%d'),
-            'type': 'SELL',
-            'price': float(current_price),
-            'contracts': position['contracts'],
-            'reason': 'End of period',
+            'date': exit_date,
+            'type': SELL,
+            'price': exit_price,
+            'contracts': contracts,
+            'reason': signal_reason if kind == EXIT_SIGNAL else exit_reasons[kind],
             'stopLossPrice': None,
             'takeProfitPrice': None,
-            'pnl': float(pnl),
+            'pnl': pnl,
             'commission': exit_costs,
             'exchangeFees': 0,
             'clearingFees': 0,
-            'overnightFinancing': float(overnight_costs)
+            'overnightFinancing': overnight_costs
         })
 
-        remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-        total_costs += exit_costs + overnight_costs
-
-    final_value = remaining_capital
     return trades, total_costs, final_value
 
-def strategy_seasonal(df, capital, specs, costs, stop_loss_method, stop_loss_value):
-    """Seasonal/Monthly Pattern Strategy"""
-    # Analyze historical monthly performance
-    from collections import defaultdict
-    import statistics
-
-    monthly_data = defaultdict(lambda: {'returns': []})
-    prev_month_close = None
-    prev_date = None
-
-    for date, row in df.iterrows():
-        if prev_month_close is not None and date.month != prev_date.month:
-            monthly_return = ((row['Close'] - prev_month_close) / prev_month_close) * 100
-            month_name = prev_date.strftime('%B')
-            monthly_data[month_name]['returns'].append(monthly_return)
-
-        if date.month != (prev_date.month if prev_date else 0):
-            prev_month_close = row['Close']
-
-        prev_date = date
+def prepare_indicators(df):
+    """
+    Compute the indicators used by the strategies once, as NumPy arrays, so
+    strategies never add columns to (or copy) the price frame
+    """
+    close = df['Close']
+    macd_line, signal_line = calculate_macd(close)
+    bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(close)
+    return {
+        'Close': close.to_numpy(),
+        'SMA50': calculate_sma(close, 50).to_numpy(),
+        'SMA200': calculate_sma(close, 200).to_numpy(),
+        'RSI': calculate_rsi(close, 14).to_numpy(),
+        'MACD': macd_line.to_numpy(),
+        'Signal': signal_line.to_numpy(),
+        'BB_Upper': bb_upper.to_numpy(),
+        'BB_Middle': bb_middle.to_numpy(),
+        'BB_Lower': bb_lower.to_numpy(),
+        'ATR14': calculate_atr(df, 14).to_numpy(),
+        'Volatility20': calculate_volatility(close, 20).to_numpy(),
+    }
 
-    # Find best 4 months
-    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
-                   'July', 'August', 'September', 'October', 'November', 'December']
+def strategy_sma_crossover(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=None):
+    """SMA Crossover Strategy (50/200)"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
 
-    monthly_stats = []
-    for month in month_order:
-        if month in monthly_data and len(monthly_data[month]['returns']) > 0:
-            returns = monthly_data[month]['returns']
-            avg_return = statistics.mean(returns)
-            monthly_stats.append({'month': month, 'avgReturn': avg_return})
+    cross_up, cross_down = _crossings(ind['SMA50'], ind['SMA200'])
 
-    monthly_stats_sorted = sorted(monthly_stats, key=lambda x: x['avgReturn'], reverse=True)
-    best_months = [m['month'] for m in monthly_stats_sorted[:4]]
+    # Wait for SMA200 to be valid
+    return _run_signal_strategy(
+        df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+        entry_signal=cross_up,
+        exit_signal=cross_down,
+        start_idx=200,
+        entry_reason='SMA50 crossed above SMA200',
+        exit_reason='SMA50 crossed below SMA200')
+
+def strategy_rsi(df, capital, specs, costs, stop_loss_method, stop_loss_value, oversold=30, overbought=70,
+                 indicators=None):
+    """RSI Strategy (30/70 thresholds)"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
+    rsi = ind['RSI']
 
-    # Backtest: Buy on first day of best months, sell at end
-    trades = []
-    position = None
-    remaining_capital = capital
-    total_costs = 0
-
-    for i in range(len(df)):
-        current_date = df.index[i]
-        current_price = df['Close'].iloc[i]
-        month_name = current_date.strftime('%B')
-
-        # Entry: First trading day of best months (within first 5 days)
-        if position is None and month_name in best_months and current_date.day <= 5:
-            contracts = int(remaining_capital / specs['margin'])
-            if contracts >= 1:
-                atr = df['ATR14'].iloc[i] if 'ATR14' in df.columns else None
-                vol = df['Volatility20'].iloc[i] if 'Volatility20' in df.columns else None
-                stop_price = calculate_stop_loss(current_price, stop_loss_method, stop_loss_value, atr, vol, 'long')
-
-                entry_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * contracts
-
-                position = {
-                    'entry_price': current_price,
-                    'entry_date': current_date,
-                    'contracts': contracts,
-                    'stop_price': stop_price,
-                    'entry_costs': entry_costs,
-                    'entry_month': month_name
-                }
-
-                trades.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(current_price),
-                    'contracts': contracts,
-                    'reason': f'Start of {month_name} (best month)',
-                    'stopLossPrice': float(stop_price) if stop_price else None,
-                    'takeProfitPrice': None,
-                    'pnl': None,
-                    'commission': entry_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': 0
-                })
-
-                remaining_capital -= (specs['margin'] * contracts) + entry_costs
-                total_costs += entry_costs
-
-        # Check stop-loss
-        elif position and position['stop_price'] and current_price <= position['stop_price']:
-            days_held = (current_date - position['entry_date']).days
-            exit_price = position['stop_price']
-            exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-            overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-            pnl = (exit_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-            trades.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'type': 'SELL',
-                'price': float(exit_price),
-                'contracts': position['contracts'],
-                'reason': 'Stop-loss triggered',
-                'stopLossPrice': None,
-                'takeProfitPrice': None,
-                'pnl': float(pnl),
-                'commission': exit_costs,
-                'exchangeFees': 0,
-                'clearingFees': 0,
-                'overnightFinancing': float(overnight_costs)
-            })
-
-            remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-            total_costs += exit_costs + overnight_costs
-            position = None
-
-        # Exit: End of month or start of non-best month
-        elif position and (month_name != position['entry_month'] or current_date.day >= 25):
-            if month_name != position['entry_month']:
-                days_held = (current_date - position['entry_date']).days
-                exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-                overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-                pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
-
-                trades.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'SELL',
-                    'price': float(current_price),
-                    'contracts': position['contracts'],
-                    'reason': f'End of {position["entry_month"]}',
-                    'stopLossPrice': None,
-                    'takeProfitPrice': None,
-                    'pnl': float(pnl),
-                    'commission': exit_costs,
-                    'exchangeFees': 0,
-                    'clearingFees': 0,
-                    'overnightFinancing': float(overnight_costs)
-                })
-
-                remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-                total_costs += exit_costs + overnight_costs
-                position = None
-
-    # Close any open position at end
-    if position:
-        i = len(df) - 1
-        days_held = (df.index[i] - position['entry_date']).days
-        current_price = df['Close'].iloc[i]
-        exit_costs = (costs['commission'] + costs['exchangeFee'] + costs['clearingFee']) * position['contracts']
-        overnight_costs = specs['margin'] * position['contracts'] * costs['overnightRate'] * days_held
-
-        pnl = (current_price - position['entry_price']) * specs['contractSize'] * position['contracts']
+    # Wait for RSI to be valid
+    return _run_signal_strategy(
+        df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+        entry_signal=_crossings(rsi, oversold)[0],
+        exit_signal=_crossings(rsi, overbought)[1],
+        start_idx=14,
+        entry_reason=f'RSI crossed above {oversold} (oversold)',
+        exit_reason=f'RSI crossed below {overbought} (overbought)')
+
+def strategy_macd(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=None):
+    """MACD Crossover Strategy"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
 
-        trades.append({
-            'date': df.index[i].strftime('%Y-%m-%d'),
-            'type': 'SELL',
-            'price': float(current_price),
-            'contracts': position['contracts'],
-            'reason': 'End of period',
-            'stopLossPrice': None,
-            'takeProfitPrice': None,
-            'pnl': float(pnl),
-            'commission': exit_costs,
-            'exchangeFees': 0,
-            'clearingFees': 0,
-            'overnightFinancing': float(overnight_costs)
-        })
+    cross_up, cross_down = _crossings(ind['MACD'], ind['Signal'])
 
-        remaining_capital += (specs['margin'] * position['contracts']) + pnl - exit_costs - overnight_costs
-        total_costs += exit_costs + overnight_costs
+    # Wait for MACD to be valid
+    return _run_signal_strategy(
+        df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+        entry_signal=cross_up,
+        exit_signal=cross_down,
+        start_idx=26,
+        entry_reason='MACD crossed above Signal',
+        exit_reason='MACD crossed below Signal')
+
+def strategy_bollinger(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=None):
+    """Bollinger Bands Mean Reversion Strategy"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
+    close = ind['Close']
 
-    final_value = remaining_capital
-    return trades, total_costs, final_value
+    # Entry: price touches or breaks below lower band; exit: price returns to middle band
+    # Wait for Bollinger Bands to be valid
+    return _run_signal_strategy(
+        df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+        entry_signal=close <= ind['BB_Lower'],
+        exit_signal=close >= ind['BB_Middle'],
+        start_idx=20,
+        entry_reason='Price touched lower Bollinger Band',
+        exit_reason='Price returned to middle band')
+
+def strategy_seasonal(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=None):
+    """Seasonal/Monthly Pattern Strategy"""
+    ind = indicators if indicators is not None else prepare_indicators(df)
+    close = ind['Close']
+
+    # Analyze historical monthly performance: return from the first close of
+    # each calendar month to the first close of the next month in the data
+    month_nums = df.index.month.to_numpy()
+    year_months = df.index.year.to_numpy() * 12 + month_nums
+    month_starts = np.flatnonzero(np.diff(year_months, prepend=-1))
+    first_closes = close[month_starts]
+    monthly_returns = pd.Series(
+        ((first_closes[1:] - first_closes[:-1]) / first_closes[:-1]) * 100,
+        index=month_nums[month_starts[:-1]])
+    avg_by_month = monthly_returns.groupby(level=0).mean()
+
+    # Find best 4 months (ties keep calendar order)
+    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
+                   'July', 'August', 'September', 'October', 'November', 'December']
+    best_month_nums = avg_by_month.sort_values(ascending=False, kind='stable').index[:4]
+
+    # Backtest: Buy on the first trading days (day <= 5) of the best months;
+    # sell when the month changes, on the stop-loss, or at the end of the data
+    month_names = np.array(month_order, dtype=object)[month_nums - 1]
+    return _run_signal_strategy(
+        df, ind, capital, specs, costs, stop_loss_method, stop_loss_value,
+        entry_signal=np.isin(month_nums, best_month_nums) & (df.index.day.to_numpy() <= 5),
+        exit_signal=np.diff(month_nums, prepend=month_nums[:1]) != 0,
+        start_idx=0,
+        entry_reason='Start of ' + month_names + ' (best month)',
+        exit_reason='End of ' + month_names)
 
 def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method, stop_loss_value):
     """
@@ -1018,15 +642,13 @@ def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method
 
         sys.stderr.write(f"Fetching {symbol} data from {start_date.date()} to {end_date.date()}...\n")
 
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(start=start_date, end=end_date)
+        df = load_prices(symbol, start_date, end_date)
 
         if df.empty:
             return {'success': False, 'error': f'No data found for {symbol}'}
 
-        # Calculate technical indicators
-        df['ATR14'] = calculate_atr(df, 14)
-        df['Volatility20'] = calculate_volatility(df['Close'], 20)
+        # Calculate technical indicators (once, shared by whichever strategy runs)
+        indicators = prepare_indicators(df)
 
         # Get specs and costs
         specs = get_commodity_specs(symbol)
@@ -1041,17 +663,17 @@ def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method
         final_value = capital
 
         if strategy.lower() == 'buyhold':
-            trades, total_costs, final_value = strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_buy_hold(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         elif strategy.lower() == 'sma':
-            trades, total_costs, final_value = strategy_sma_crossover(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_sma_crossover(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         elif strategy.lower() == 'rsi':
-            trades, total_costs, final_value = strategy_rsi(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_rsi(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         elif strategy.lower() == 'macd':
-            trades, total_costs, final_value = strategy_macd(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_macd(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         elif strategy.lower() == 'bollinger':
-            trades, total_costs, final_value = strategy_bollinger(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_bollinger(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         elif strategy.lower() == 'seasonal':
-            trades, total_costs, final_value = strategy_seasonal(df, capital, specs, costs, stop_loss_method, stop_loss_value)
+            trades, total_costs, final_value = strategy_seasonal(df, capital, specs, costs, stop_loss_method, stop_loss_value, indicators=indicators)
         else:
             return {'success': False, 'error': f'Unknown strategy: {strategy}'}
 
@@ -1059,40 +681,29 @@ def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method
         total_return = ((final_value - capital) / capital) * 100
         annual_return = total_return / years
 
-        # Calculate drawdown, win rate, etc.
-        winning_trades = [t for t in trades if t.get('pnl') and t['pnl'] > 0]
-        losing_trades = [t for t in trades if t.get('pnl') and t['pnl'] < 0]
-        total_trades = len([t for t in trades if t.get('pnl') is not None])
-        win_rate = (len(winning_trades) / total_trades * 100) if total_trades > 0 else 0
+        # Calculate drawdown, win rate, etc. from one array of closed-trade P&L
+        pnl = np.fromiter((t['pnl'] for t in trades if t.get('pnl') is not None), dtype=np.float64)
+        total_trades = len(pnl)
+        wins = pnl > 0
+        losses = pnl < 0
+        win_rate = (np.count_nonzero(wins) / total_trades * 100) if total_trades > 0 else 0
 
         # Profit factor
-        gross_profit = sum(t['pnl'] for t in winning_trades) if winning_trades else 0
-        gross_loss = abs(sum(t['pnl'] for t in losing_trades)) if losing_trades else 0
+        gross_profit = float(pnl[wins].sum())
+        gross_loss = abs(float(pnl[losses].sum()))
         profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
 
         # Sharpe ratio (simplified)
         if total_trades > 0:
-            returns = [t.get('pnl', 0) for t in trades if t.get('pnl') is not None]
-            avg_return = np.mean(returns)
-            std_return = np.std(returns)
-            sharpe_ratio = (avg_return / std_return) if std_return > 0 else 0
+            std_return = np.std(pnl)
+            sharpe_ratio = (np.mean(pnl) / std_return) if std_return > 0 else 0
         else:
             sharpe_ratio = 0
 
         # Max drawdown (simplified - track equity curve)
-        equity_curve = [capital]
-        for trade in trades:
-            if trade.get('pnl') is not None:
-                equity_curve.append(equity_curve[-1] + trade['pnl'])
-
-        peak = equity_curve[0]
-        max_dd = 0
-        for value in equity_curve:
-            if value > peak:
-                peak = value
-            dd = ((peak - value) / peak) * 100
-            if dd > max_dd:
-                max_dd = dd
+        equity_curve = np.cumsum(np.concatenate(([capital], pnl)))
+        peaks = np.fmax.accumulate(equity_curve)
+        max_dd = max(float(np.nanmax(((peaks - equity_curve) / peaks) * 100)), 0)
 
         # Build response
         response = {
@@ -1104,7 +715,7 @@ def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method
             'stopLossValue': float(stop_loss_value),
             'period': f'{years}Y',
             'capital': float(capital),
-            'contractsTraded': sum(t.get('contracts', 0) for t in trades if t['type'] == 'BUY'),
+            'contractsTraded': sum(t['contracts'] for t in trades if t['type'] == BUY),
             'finalValue': round(final_value, 2),
             'totalReturn': round(total_return, 2),
             'annualReturn': round(annual_return, 2),
@@ -1132,12 +743,71 @@ def backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method
         traceback.print_exc(file=sys.stderr)
         return {'success': False, 'error': str(e)}
 
+VALID_STRATEGIES = ['buyhold', 'sma', 'rsi', 'macd', 'bollinger', 'seasonal']
+VALID_STOP_METHODS = ['atr', 'percentage', 'volatility', 'fixed']
+
+def validate_inputs(strategy, stop_loss_method):
+    """Return an error message for an invalid strategy/stop-loss method, else None"""
+    if strategy not in VALID_STRATEGIES:
+        return f'Invalid strategy. Must be one of: {", ".join(VALID_STRATEGIES)}'
+    if stop_loss_method not in VALID_STOP_METHODS:
+        return f'Invalid stop-loss method. Must be one of: {", ".join(VALID_STOP_METHODS)}'
+    return None
+
+def _run_batch_config(config):
+    """Run one batch entry: {symbol, strategy, capital, years, stopLossMethod, stopLossValue}"""
+    try:
+        symbol = str(config['symbol']).upper()
+        strategy = str(config['strategy']).lower()
+        capital = float(config['capital'])
+        years = int(config['years'])
+        stop_loss_method = str(config['stopLossMethod']).lower()
+        stop_loss_value = config['stopLossValue']
+    except (KeyError, TypeError, ValueError) as e:
+        return {'success': False, 'error': f'Invalid batch entry {config!r}: {e}'}
+
+    error = validate_inputs(strategy, stop_loss_method)
+    if error:
+        return {'success': False, 'error': error}
+    return backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method, stop_loss_value)
+
+def run_batch(configs, max_workers=None):
+    """Run many backtest configs in parallel worker processes; results keep input order"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not configs:
+        return []
+    max_workers = min(max_workers or os.cpu_count() or 1, len(configs))
+    if max_workers == 1:
+        return [_run_batch_config(config) for config in configs]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_run_batch_config, configs))
+
 def main():
+    # Batch mode: JSON list of configs from a file (or '-' for stdin), one result per config
+    if len(sys.argv) >= 3 and sys.argv[1] == '--batch':
+        try:
+            if sys.argv[2] == '-':
+                configs = json.load(sys.stdin)
+            else:
+                with open(sys.argv[2], 'r') as f:
+                    configs = json.load(f)
+            if not isinstance(configs, list):
+                raise ValueError('batch file must contain a JSON list of configs')
+        except (OSError, ValueError) as e:
+            write_json({'success': False, 'error': f'Could not read batch configs: {e}'}, pretty=True)
+            sys.exit(1)
+
+        results = run_batch(configs)
+        write_json(results, pretty=True)
+        sys.exit(0 if all(r['success'] for r in results) else 1)
+
     if len(sys.argv) < 7:
-        print(json.dumps({
+        write_json({
             'success': False,
             'error': 'Usage: python backtest_single_commodity.py <symbol> <strategy> <capital> <years> <stopLossMethod> <stopLossValue>'
-        }, indent=2))
+                     ' | --batch <configs.json|->'
+        }, pretty=True)
         sys.exit(1)
 
     symbol = sys.argv[1].upper()
@@ -1148,29 +818,18 @@ def main():
     stop_loss_value = sys.argv[6]
 
     # Validate inputs
-    valid_strategies = ['buyhold', 'sma', 'rsi', 'macd', 'bollinger', 'seasonal']
-    if strategy not in valid_strategies:
-        print(json.dumps({
-            'success': False,
-            'error': f'Invalid strategy. Must be one of: {", ".join(valid_strategies)}'
-        }, indent=2))
-        sys.exit(1)
-
-    valid_stop_methods = ['atr', 'percentage', 'volatility', 'fixed']
-    if stop_loss_method not in valid_stop_methods:
-        print(json.dumps({
-            'success': False,
-            'error': f'Invalid stop-loss method. Must be one of: {", ".join(valid_stop_methods)}'
-        }, indent=2))
+    error = validate_inputs(strategy, stop_loss_method)
+    if error:
+        write_json({'success': False, 'error': error}, pretty=True)
         sys.exit(1)
 
     # Run backtest
     result = backtest_single_commodity(symbol, strategy, capital, years, stop_loss_method, stop_loss_value)
 
     # Output JSON
-    print(json.dumps(result, indent=2))
+    write_json(result, pretty=True)
 
     sys.exit(0 if result['success'] else 1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
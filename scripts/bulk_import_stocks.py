@@ -5,14 +5,34 @@ Imports stocks from JSON file with progress tracking
 """
 
 import json
+import os
 import time
+from concurrent.futures import as_completed
 from update_stocks_from_yahoo import StockDataUpdater
 from datetime import datetime
+from rate_limiter import ImportExecutor, RateLimiter
+
+# Yahoo fetches run concurrently; DB writes stay on the main thread
+MAX_WORKERS = 8
+# Minimum spacing between fetch starts across all workers (rate limit).
+# Shared by all workers, so the overall Yahoo request rate stays the same as
+# the old sequential loop no matter how many threads there are
+MIN_REQUEST_INTERVAL = float(os.environ.get('MIN_REQUEST_INTERVAL', 0.5))
+# Max symbols per IN (...) query; older SQLite builds cap bound parameters at 999
+SQL_PARAM_CHUNK = 900
 
 def log(message):
     """Print log message"""
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
 
+def save_stock(updater, symbol, data):
+    """Insert or update one fetched stock (main thread only; sqlite3 connection isn't shared)"""
+    updater.cursor.execute("SELECT Id FROM DividendModels WHERE Symbol = ?", (symbol,))
+    existing = updater.cursor.fetchone()
+    if existing:
+        return updater.update_stock(existing[0], data)
+    return updater.insert_stock(symbol, data)
+
 def bulk_import(json_file='stocks_list.json', limit=None, skip_existing=True):
     """
     Import stocks from JSON file
@@ -51,9 +71,15 @@ def bulk_import(json_file='stocks_list.json', limit=None, skip_existing=True):
     existing_symbols = set()
     if skip_existing:
         try:
-            updater.cursor.execute("SELECT Symbol FROM DividendModels")
-            existing_symbols = {row[0] for row in updater.cursor.fetchall()}
-            log(f"  Found {len(existing_symbols)} existing stocks in database")
+            # Only look up the symbols being imported (uses the unique Symbol index);
+            # chunked to stay under SQLite's bound-parameter limit
+            symbols = [s['symbol'] for s in stocks]
+            for i in range(0, len(symbols), SQL_PARAM_CHUNK):
+                chunk = symbols[i:i + SQL_PARAM_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                updater.cursor.execute(f"SELECT Symbol FROM DividendModels WHERE Symbol IN ({placeholders})", chunk)
+                existing_symbols.update(row[0] for row in updater.cursor.fetchall())
+            log(f"  Found {len(existing_symbols)} of these stocks already in database")
         except Exception as e:
             log(f"  Warning: Could not fetch existing symbols: {e}")
 
@@ -72,49 +98,62 @@ def bulk_import(json_file='stocks_list.json', limit=None, skip_existing=True):
 
     start_time = time.time()
 
-    # Process each stock
-    for idx, stock_info in enumerate(stocks, 1):
+    # Skip existing up front, then fetch the rest concurrently
+    pending = []
+    for stock_info in stocks:
         symbol = stock_info['symbol']
-
-        # Progress indicator
-        progress = f"[{idx}/{stats['total']}]"
-
-        # Skip if exists
         if skip_existing and symbol in existing_symbols:
-            log(f"{progress} ⊘ SKIP {symbol} (already exists)")
+            log(f"⊘ SKIP {symbol} (already exists)")
             stats['skipped_existing'] += 1
-            continue
-
-        log(f"{progress} → Processing {symbol} ({stock_info.get('name', 'Unknown')})...")
-
-        # Process the stock
-        success = updater.process_stock(symbol)
-
-        if success:
-            stats['succeeded'] += 1
-            log(f"{progress} ✓ SUCCESS {symbol}")
         else:
-            stats['failed'] += 1
-            stats['failed_symbols'].append(symbol)
-            log(f"{progress} ✗ FAILED {symbol}")
-
-        # Rate limiting: Wait 0.5 seconds between requests
-        if idx < stats['total']:
-            time.sleep(0.5)
-
-        # Progress summary every 10 stocks
-        if idx % 10 == 0:
-            elapsed = time.time() - start_time
-            avg_time = elapsed / idx
-            remaining = (stats['total'] - idx) * avg_time
-            log(f"\n--- Progress: {idx}/{stats['total']} | "
-                f"Success: {stats['succeeded']} | "
-                f"Failed: {stats['failed']} | "
-                f"Skipped: {stats['skipped_existing']} | "
-                f"ETA: {remaining/60:.1f} min ---\n")
+            pending.append(stock_info)
+
+    limiter = RateLimiter(MIN_REQUEST_INTERVAL)
+
+    def fetch(symbol):
+        limiter.wait()
+        return updater.fetch_yahoo_data(symbol)
+
+    with ImportExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {}
+        for stock_info in pending:
+            log(f"→ Queued {stock_info['symbol']} ({stock_info.get('name', 'Unknown')})")
+            futures[pool.submit(fetch, stock_info['symbol'])] = stock_info['symbol']
+
+        for idx, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+
+            # Progress indicator
+            progress = f"[{idx}/{len(pending)}]"
+
+            try:
+                data = future.result()
+                success = bool(data) and save_stock(updater, symbol, data)
+            except Exception as e:
+                log(f"{progress}   Error: {e}")
+                success = False
+
+            if success:
+                stats['succeeded'] += 1
+                log(f"{progress} ✓ SUCCESS {symbol}")
+            else:
+                stats['failed'] += 1
+                stats['failed_symbols'].append(symbol)
+                log(f"{progress} ✗ FAILED {symbol}")
+
+            # Progress summary every 10 stocks
+            if idx % 10 == 0:
+                elapsed = time.time() - start_time
+                avg_time = elapsed / idx
+                remaining = (len(pending) - idx) * avg_time
+                log(f"\n--- Progress: {idx}/{len(pending)} | "
+                    f"Success: {stats['succeeded']} | "
+                    f"Failed: {stats['failed']} | "
+                    f"Skipped: {stats['skipped_existing']} | "
+                    f"ETA: {remaining/60:.1f} min ---\n")
 
     # Close database
-    updater.close_db()
+    updater.close()
 
     # Final summary
     elapsed = time.time() - start_time
@@ -13,61 +13,82 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='repla
 import requests
 import time
 import json
+from collections import Counter
+from concurrent.futures import as_completed
 from datetime import datetime
+from http_session import make_session
+from rate_limiter import ImportExecutor, RateLimiter
 import urllib.request
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration
 API_BASE_URL = "http://localhost:5000"
 NASDAQ_FTP_URL = "ftp://ftp.nasdaqtrader.com/symboldirectory/nasdaqlisted.txt"
 OTHER_FTP_URL = "ftp://ftp.nasdaqtrader.com/symboldirectory/otherlisted.txt"
 
-# Rate limiting: 2 seconds between requests = 1800 requests/hour (safe for Yahoo Finance)
+# Rate limiting: 2 seconds between request starts = 1800 requests/hour (safe for Yahoo Finance)
 DELAY_BETWEEN_REQUESTS = 2.0  # seconds
+# Requests in flight at once; overlaps API latency without exceeding the rate above
+MAX_CONCURRENT_REQUESTS = 8
+# Symbols per POST to the batch analysis endpoint
+BATCH_SIZE = 25
 
 # Batch progress reporting
 PROGRESS_REPORT_INTERVAL = 50  # Report progress every 50 stocks
+# Failures echoed at the end of the run (all of them are in the results file)
+SAMPLE_FAILURES = 10
+
+# Report bucket per exchange code of otherlisted.txt; NASDAQ stocks carry no code
+EXCHANGE_BUCKETS = {'N': 'nyse', 'A': 'nyse_mkt', 'P': 'nyse_arca'}
+
+# One session for every API call
+SESSION = make_session()
+
+def _read_listing(url):
+    """
+    Read a nasdaqtrader.com pipe-delimited symbol directory with the C parser.
+    All fields are kept as stripped strings (so symbols like 'NA' stay strings);
+    the trailing 'File Creation Time' footer row is dropped
+    """
+    response = urllib.request.urlopen(url)
+    df = pd.read_csv(response, sep='|', dtype=str, keep_default_na=False)
+    df = df.iloc[:-1]
+    df = df.apply(lambda col: col.str.strip())
+    return df[df.iloc[:, 0] != '']
+
 
 def fetch_nasdaq_listings():
     """Fetch NASDAQ listed stocks from FTP"""
     print(f"📥 Fetching NASDAQ listings from FTP...")
 
     try:
-        response = urllib.request.urlopen(NASDAQ_FTP_URL)
-        content = response.read().decode('utf-8')
-
-        stocks = []
-        lines = content.strip().split('\n')
-
-        # Skip header and footer
-        for line in lines[1:-1]:  # First line is header, last line is footer
-            if not line.strip():
-                continue
-
-            parts = line.split('|')
-            if len(parts) < 8:
-                continue
-
-            symbol = parts[0].strip()
-            name = parts[1].strip()
-            market_category = parts[2].strip()
-            test_issue = parts[3].strip()
-            financial_status = parts[4].strip()
-
-            # Skip test issues and invalid symbols
-            if test_issue == 'Y':
-                continue
-            if '$' in symbol or '.' in symbol:  # Skip special symbols
-                continue
-            if len(symbol) > 5:  # Skip very long symbols (usually test/special)
-                continue
-
-            stocks.append({
-                'symbol': symbol,
+        df = _read_listing(NASDAQ_FTP_URL)
+
+        # Columns: Symbol|Security Name|Market Category|Test Issue|Financial Status|...
+        symbol = df.iloc[:, 0]
+        keep = (
+            (df.iloc[:, 3] != 'Y')                           # Skip test issues
+            & ~symbol.str.contains(r'[$.]', regex=True)      # Skip special symbols
+            & (symbol.str.len() <= 5)                        # Skip very long symbols (usually test/special)
+        )
+        df = df[keep]
+
+        stocks = [
+            {
+                'symbol': sym,
                 'name': name,
                 'exchange': 'NASDAQ',
                 'market_category': market_category,
                 'financial_status': financial_status
-            })
+            }
+            for sym, name, market_category, financial_status in zip(
+                df.iloc[:, 0], df.iloc[:, 1], df.iloc[:, 2], df.iloc[:, 4])
+        ]
 
         print(f"✓ Found {len(stocks)} NASDAQ stocks")
         return stocks
@@ -81,51 +102,36 @@ def fetch_other_listings():
     """Fetch NYSE, AMEX and other exchange stocks from FTP"""
     print(f"📥 Fetching other US exchange listings from FTP...")
 
+    # Map exchange codes
+    exchange_map = {
+        'A': 'NYSE MKT',
+        'N': 'NYSE',
+        'P': 'NYSE ARCA',
+        'Z': 'BATS',
+        'V': 'IEX'
+    }
+
     try:
-        response = urllib.request.urlopen(OTHER_FTP_URL)
-        content = response.read().decode('utf-8')
-
-        stocks = []
-        lines = content.strip().split('\n')
-
-        # Skip header and footer
-        for line in lines[1:-1]:
-            if not line.strip():
-                continue
-
-            parts = line.split('|')
-            if len(parts) < 7:
-                continue
-
-            symbol = parts[0].strip()
-            name = parts[1].strip()
-            exchange = parts[2].strip()  # A=NYSE MKT, N=NYSE, P=NYSE ARCA, Z=BATS, etc.
-            test_issue = parts[4].strip()
-
-            # Map exchange codes
-            exchange_map = {
-                'A': 'NYSE MKT',
-                'N': 'NYSE',
-                'P': 'NYSE ARCA',
-                'Z': 'BATS',
-                'V': 'IEX'
-            }
-            exchange_name = exchange_map.get(exchange, f'Other-{exchange}')
-
-            # Skip test issues and invalid symbols
-            if test_issue == 'Y':
-                continue
-            if '$' in symbol or '^' in symbol:  # Skip special symbols
-                continue
-            if len(symbol) > 5:
-                continue
-
-            stocks.append({
-                'symbol': symbol,
+        df = _read_listing(OTHER_FTP_URL)
+
+        # Columns: ACT Symbol|Security Name|Exchange|CQS Symbol|...
+        symbol = df.iloc[:, 0]
+        keep = (
+            (df.iloc[:, 4] != 'Y')
+            & ~symbol.str.contains(r'[$^]', regex=True)      # Skip special symbols
+            & (symbol.str.len() <= 5)
+        )
+        df = df[keep]
+
+        stocks = [
+            {
+                'symbol': sym,
                 'name': name,
-                'exchange': exchange_name,
+                'exchange': exchange_map.get(exchange, f'Other-{exchange}'),
                 'exchange_code': exchange
-            })
+            }
+            for sym, name, exchange in zip(df.iloc[:, 0], df.iloc[:, 1], df.iloc[:, 2])
+        ]
 
         print(f"✓ Found {len(stocks)} stocks from other exchanges")
         return stocks
@@ -135,13 +141,20 @@ def fetch_other_listings():
         return []
 
 
-def import_stock(stock, index, total):
+def exchange_bucket(stock):
+    """exchange_breakdown key for a stock: nasdaq, nyse, nyse_mkt, nyse_arca or other"""
+    if stock['exchange'] == 'NASDAQ':
+        return 'nasdaq'
+    return EXCHANGE_BUCKETS.get(stock.get('exchange_code'), 'other')
+
+
+def import_stock(stock):
     """Import a single stock via API"""
     symbol = stock['symbol']
 
     try:
         url = f"{API_BASE_URL}/api/dividends/analyze/{symbol}"
-        response = requests.get(url, timeout=60)
+        response = SESSION.get(url, timeout=60)
 
         if response.status_code == 200:
             return {'success': True, 'stock': stock}
@@ -161,6 +174,61 @@ def import_stock(stock, index, total):
         return {'success': False, 'stock': stock, 'error': str(e)}
 
 
+def import_batch(stocks):
+    """Import a batch of stocks with one POST to the batch analysis endpoint"""
+    try:
+        url = f"{API_BASE_URL}/api/dividends/analyze/batch"
+        response = SESSION.post(url, json={'symbols': [s['symbol'] for s in stocks]},
+                                timeout=60 * len(stocks))
+
+        if response.status_code in (404, 405):
+            # API without the batch endpoint: fall back to one request per stock
+            return [import_stock(stock) for stock in stocks]
+        if response.status_code != 200:
+            error_msg = f"HTTP {response.status_code}"
+            return [{'success': False, 'stock': stock, 'error': error_msg} for stock in stocks]
+
+        by_symbol = {r['symbol']: r for r in response.json().get('results', [])}
+        results = []
+        for stock in stocks:
+            r = by_symbol.get(stock['symbol'].upper())
+            if r is None:
+                results.append({'success': False, 'stock': stock, 'error': 'No result returned'})
+            elif r.get('success'):
+                results.append({'success': True, 'stock': stock})
+            else:
+                results.append({'success': False, 'stock': stock, 'error': r.get('error', 'Unknown error')})
+        return results
+
+    except requests.exceptions.Timeout:
+        return [{'success': False, 'stock': stock, 'error': f'Timeout after {60 * len(stocks)}s'} for stock in stocks]
+    except Exception as e:
+        return [{'success': False, 'stock': stock, 'error': str(e)} for stock in stocks]
+
+
+def _json_line(obj):
+    """One JSON Lines record as UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _read_results(path):
+    """
+    (successful_stocks, failed_stocks) read back from a results JSON Lines
+    file, in the shape the report has always carried
+    """
+    successful, failed = [], []
+    with open(path, 'rb') as f:
+        for line in f:
+            record = orjson.loads(line) if orjson is not None else json.loads(line)
+            if record.pop('success'):
+                successful.append(record)
+            else:
+                failed.append({'symbol': record['symbol'], 'error': record['error']})
+    return successful, failed
+
+
 def bulk_import_us_stocks():
     """Main function to bulk import all US stocks"""
     print("=" * 80)
@@ -189,53 +257,76 @@ def bulk_import_us_stocks():
     print("=" * 80)
     print()
 
-    # Step 2: Import each stock with rate limiting
-    successful = []
-    failed = []
+    # Step 2: Import stocks in batches, concurrently, with request starts rate limited.
+    # Each result is appended to a JSON Lines file as it arrives, so only running
+    # counts are kept in memory and an interrupted run keeps its progress
+    run_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    results_filename = f"us_import_{run_stamp}.jsonl"
+    successful_count = 0
+    failed_count = 0
+    failed_sample = []
+    exchange_counts = Counter()
     start_time = time.time()
-
-    for index, stock in enumerate(all_stocks, 1):
-        symbol = stock['symbol']
-        exchange = stock['exchange']
-
-        # Progress indicator
-        progress = (index / total_stocks) * 100
-        print(f"[{index}/{total_stocks}] ({progress:.1f}%) {symbol:6s} | {exchange:12s}", end='', flush=True)
-
-        # Import the stock
-        result = import_stock(stock, index, total_stocks)
-
-        if result['success']:
-            successful.append(result['stock'])
-            print(" ✓ Success")
-        else:
-            failed.append({'symbol': symbol, 'error': result['error']})
-            print(f" ✗ Failed: {result['error']}")
-
-        # Progress report every N stocks
-        if index % PROGRESS_REPORT_INTERVAL == 0:
-            elapsed = time.time() - start_time
-            rate = index / elapsed if elapsed > 0 else 0
-            remaining = (total_stocks - index) / rate if rate > 0 else 0
-            print()
-            print(f"   📈 Progress: {index}/{total_stocks} | Success: {len(successful)} | Failed: {len(failed)}")
-            print(f"   ⏱️  Elapsed: {elapsed/60:.1f}m | Remaining: {remaining/60:.1f}m | Rate: {rate*60:.1f}/min")
-            print()
-
-        # Rate limiting (except for last stock)
-        if index < total_stocks:
-            time.sleep(DELAY_BETWEEN_REQUESTS)
+    limiter = RateLimiter(DELAY_BETWEEN_REQUESTS)
+
+    def worker(batch):
+        # Reserve the same per-stock spacing as one request per stock would
+        limiter.wait(cost=len(batch))
+        return import_batch(batch)
+
+    batches = [all_stocks[i:i + BATCH_SIZE] for i in range(0, total_stocks, BATCH_SIZE)]
+    index = 0
+
+    with open(results_filename, 'ab', buffering=1 << 16) as results_file, \
+            ImportExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        futures = [pool.submit(worker, batch) for batch in batches]
+
+        for future in as_completed(futures):
+            for result in future.result():
+                index += 1
+                stock = result['stock']
+                symbol = stock['symbol']
+                exchange = stock['exchange']
+
+                # Progress indicator
+                progress = (index / total_stocks) * 100
+                line = f"[{index}/{total_stocks}] ({progress:.1f}%) {symbol:6s} | {exchange:12s}"
+
+                if result['success']:
+                    successful_count += 1
+                    exchange_counts[exchange_bucket(stock)] += 1
+                    results_file.write(_json_line({**stock, 'success': True}))
+                    sys.stdout.write(f"{line} ✓ Success\n")
+                else:
+                    failed_count += 1
+                    if len(failed_sample) < SAMPLE_FAILURES:
+                        failed_sample.append({'symbol': symbol, 'error': result['error']})
+                    results_file.write(_json_line({**stock, 'success': False, 'error': result['error']}))
+                    sys.stdout.write(f"{line} ✗ Failed: {result['error']}\n")
+
+                # Progress report every N stocks; the per-stock lines above are
+                # buffered and only pushed to the console here
+                if index % PROGRESS_REPORT_INTERVAL == 0:
+                    elapsed = time.time() - start_time
+                    rate = index / elapsed if elapsed > 0 else 0
+                    remaining = (total_stocks - index) / rate if rate > 0 else 0
+                    print()
+                    print(f"   📈 Progress: {index}/{total_stocks} | Success: {successful_count} | Failed: {failed_count}")
+                    print(f"   ⏱️  Elapsed: {elapsed/60:.1f}m | Remaining: {remaining/60:.1f}m | Rate: {rate*60:.1f}/min")
+                    print()
+                    sys.stdout.flush()
 
     # Step 3: Generate final report
     total_time = time.time() - start_time
-    success_rate = (len(successful) / total_stocks * 100) if total_stocks > 0 else 0
+    success_rate = (successful_count / total_stocks * 100) if total_stocks > 0 else 0
+    successful_stocks, failed_stocks = _read_results(results_filename)
 
     report = {
         'timestamp': datetime.now().isoformat(),
         'summary': {
             'total_stocks': total_stocks,
-            'successful': len(successful),
-            'failed': len(failed),
+            'successful': successful_count,
+            'failed': failed_count,
             'success_rate': round(success_rate, 2),
             'total_time_seconds': round(total_time, 2),
             'total_time_minutes': round(total_time / 60, 2),
@@ -243,20 +334,22 @@ def bulk_import_us_stocks():
             'rate_per_minute': round(total_stocks / (total_time / 60), 2) if total_time > 0 else 0
         },
         'exchange_breakdown': {
-            'nasdaq': len([s for s in successful if s['exchange'] == 'NASDAQ']),
-            'nyse': len([s for s in successful if s.get('exchange_code') == 'N']),
-            'nyse_mkt': len([s for s in successful if s.get('exchange_code') == 'A']),
-            'nyse_arca': len([s for s in successful if s.get('exchange_code') == 'P']),
-            'other': len([s for s in successful if s['exchange'] not in ['NASDAQ'] and s.get('exchange_code') not in ['N', 'A', 'P']])
+            bucket: exchange_counts[bucket]
+            for bucket in ('nasdaq', 'nyse', 'nyse_mkt', 'nyse_arca', 'other')
         },
-        'successful_stocks': successful,
-        'failed_stocks': failed
+        'successful_stocks': successful_stocks,
+        'failed_stocks': failed_stocks,
+        'results_file': results_filename
     }
 
     # Save report
-    report_filename = f"us_import_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(report_filename, 'w') as f:
-        json.dump(report, f, indent=2)
+    report_filename = f"us_import_report_{run_stamp}.json"
+    if orjson is not None:
+        with open(report_filename, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(report_filename, 'w') as f:
+            json.dump(report, f, indent=2)
 
     # Print final summary
     print()
@@ -264,8 +357,8 @@ def bulk_import_us_stocks():
     print("📊 FINAL REPORT")
     print("=" * 80)
     print(f"Total stocks:     {total_stocks}")
-    print(f"✓ Successful:     {len(successful)} ({success_rate:.1f}%)")
-    print(f"✗ Failed:         {len(failed)} ({100-success_rate:.1f}%)")
+    print(f"✓ Successful:     {successful_count} ({success_rate:.1f}%)")
+    print(f"✗ Failed:         {failed_count} ({100-success_rate:.1f}%)")
     print()
     print(f"⏱️  Total time:     {total_time/3600:.2f} hours ({total_time/60:.1f} minutes)")
     print(f"📈 Import rate:    {report['summary']['rate_per_minute']:.1f} stocks/minute")
@@ -274,17 +367,18 @@ def bulk_import_us_stocks():
     for exchange, count in report['exchange_breakdown'].items():
         print(f"  - {exchange.upper():12s}: {count}")
     print()
-    print(f"📄 Full report saved to: {report_filename}")
+    print(f"📄 Summary saved to: {report_filename}")
+    print(f"📄 Per-stock results: {results_filename}")
     print("=" * 80)
 
     # Print sample failures (first 10)
-    if failed:
+    if failed_sample:
         print()
-        print("Sample failures (first 10):")
-        for fail in failed[:10]:
+        print(f"Sample failures (first {SAMPLE_FAILURES}):")
+        for fail in failed_sample:
             print(f"  - {fail['symbol']:6s}: {fail['error']}")
-        if len(failed) > 10:
-            print(f"  ... and {len(failed) - 10} more (see report file)")
+        if failed_count > len(failed_sample):
+            print(f"  ... and {failed_count - len(failed_sample)} more (see {results_filename})")
 
     print()
     print("✅ Bulk import complete!")
@@ -6,15 +6,17 @@ Usage: python calculate_correlation_matrix.py <symbols> <period>
 Example: python calculate_correlation_matrix.py "GC=F,SI=F,CL=F,NG=F" 5Y
 """
 
+import os
 import sys
-import json
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from indicators import njit
+from json_output import write_json
+from price_cache import PRICE_CACHE_DIR, cache_path, read_cache, write_cache
 from statsmodels.tsa.stattools import coint
-from statsmodels.regression.linear_model import OLS
-from statsmodels.tools.tools import add_constant
 
 def parse_period(period_str):
     """Convert period string (e.g., '5Y') to years"""
@@ -23,33 +25,77 @@ def parse_period(period_str):
         return int(period_str[:-1])
     return 5  # Default
 
+def load_closes(symbols, start_date, end_date):
+    """
+    Adjusted daily closes per symbol ({symbol: Series}, symbols without data left out).
+    Cached on disk per (symbol, start day, end day); only cache misses are
+    downloaded, in one multi-ticker yf.download call
+    """
+    closes = {}
+    if PRICE_CACHE_DIR:
+        for symbol in symbols:
+            df = read_cache(cache_path(symbol, start_date, end_date, '_close'))
+            if df is not None:
+                closes[symbol] = df['Close']
+
+    missing = [s for s in dict.fromkeys(symbols) if s not in closes]
+    if not missing:
+        return closes
+
+    # yfinance fetches the tickers on its own thread pool over a shared session
+    sys.stderr.write(f"Fetching {len(missing)} symbols...\n")
+    data = yf.download(missing, start=start_date, end=end_date, group_by='ticker',
+                       threads=True, auto_adjust=True, progress=False)
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({missing[0]: data}, axis=1)
+    fetched = set(data.columns.get_level_values(0))
+
+    for symbol in missing:
+        if symbol not in fetched:
+            continue
+        close = data[symbol]['Close'].dropna()
+        if close.empty:
+            continue
+        closes[symbol] = close
+
+        if PRICE_CACHE_DIR:
+            write_cache(cache_path(symbol, start_date, end_date, '_close'), close.to_frame('Close'))
+
+    return closes
+
+@njit(cache=True)
+def _ar1_slope(spread):
+    """
+    OLS slope of the AR(1) fit diff(spread) ~ const + lag(spread), in closed form
+    and without building the lag/diff arrays (lag[0] is back-filled with spread[0])
+    """
+    n = spread.shape[0]
+    mean_x = 0.0
+    mean_y = 0.0
+    for t in range(n):
+        x = spread[t - 1] if t > 0 else spread[0]
+        mean_x += x
+        mean_y += spread[t] - x
+    mean_x /= n
+    mean_y /= n
+
+    sxy = 0.0
+    sxx = 0.0
+    for t in range(n):
+        x = spread[t - 1] if t > 0 else spread[0]
+        dx = x - mean_x
+        sxy += dx * (spread[t] - x - mean_y)
+        sxx += dx * dx
+    return sxy / sxx
+
 def calculate_half_life(spread):
-    """Calculate mean reversion half-life using AR(1) model"""
+    """Calculate mean reversion half-life using AR(1) model (spread: 1-D array)"""
     try:
-        spread_lag = spread.shift(1)
-        spread_lag.iloc[0] = spread_lag.iloc[1]
-
-        spread_ret = spread - spread_lag
-        spread_lag_const = add_constant(spread_lag)
-
-        model = OLS(spread_ret, spread_lag_const)
-        res = model.fit()
-
-        halflife = -np.log(2) / res.params.iloc[1]
+        halflife = -np.log(2) / _ar1_slope(spread)
         return int(halflife) if halflife > 0 else None
     except:
         return None
 
-def calculate_optimal_ratio(prices1, prices2):
-    """Calculate optimal hedge ratio using OLS regression"""
-    try:
-        prices2_const = add_constant(prices2)
-        model = OLS(prices1, prices2_const)
-        res = model.fit()
-        return float(res.params.iloc[1])
-    except:
-        return 1.0
-
 def test_cointegration(prices1, prices2):
     """Test for cointegration using Engle-Granger test"""
     try:
@@ -139,18 +185,16 @@ def calculate_correlation_matrix(symbols, period='5Y'):
         sys.stderr.write(f"Calculating correlations for {len(symbols)} commodities over {period}...\n")
         sys.stderr.write(f"Symbols: {', '.join(symbols)}\n")
 
-        # Fetch historical data for all symbols
+        # Fetch historical data (from the local cache where possible)
+        closes = load_closes(symbols, start_date, end_date)
+
         all_data = {}
         for symbol in symbols:
-            sys.stderr.write(f"Fetching {symbol}...\n")
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(start=start_date, end=end_date)
-
-            if df.empty:
+            if symbol not in closes:
                 sys.stderr.write(f"Warning: No data for {symbol}\n")
                 continue
 
-            all_data[symbol] = df['Close']
+            all_data[symbol] = closes[symbol]
 
         if len(all_data) < 2:
             return {
@@ -164,88 +208,104 @@ def calculate_correlation_matrix(symbols, period='5Y'):
 
         sys.stderr.write(f"Aligned data: {len(df_combined)} common dates\n")
 
-        # Calculate correlation matrix
-        corr_matrix = df_combined.corr()
+        # Centered cross-product matrix from one BLAS call; every pair's
+        # correlation and OLS hedge ratio (sym1 ~ const + sym2) follow from it
+        prices = df_combined.to_numpy(dtype=np.float64)
+        centered = prices - prices.mean(axis=0)
+        xtx = centered.T @ centered
+        variances = np.diag(xtx)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr_matrix = xtx / np.sqrt(np.outer(variances, variances))
+            hedge_ratios = xtx / variances  # [a, b]: slope of column a on column b
+        col_index = {sym: k for k, sym in enumerate(df_combined.columns)}
+        columns = {sym: prices[:, k] for sym, k in col_index.items()}
 
         # Build correlation matrix response
         correlation_matrix = []
         pair_suggestions = []
 
-        # Analyze all pairs
+        # Pairs in symbol order, with their correlation
+        pairs = []
         for i, sym1 in enumerate(symbols):
-            if sym1 not in df_combined.columns:
+            if sym1 not in col_index:
                 continue
 
             for j, sym2 in enumerate(symbols):
-                if sym2 not in df_combined.columns or i >= j:
+                if sym2 not in col_index or i >= j:
                     continue
 
-                # Get correlation
-                correlation = float(corr_matrix.loc[sym1, sym2])
+                a, b = col_index[sym1], col_index[sym2]
+                pairs.append((sym1, sym2, a, b, float(corr_matrix[a, b])))
 
-                # Test cointegration
-                prices1 = df_combined[sym1]
-                prices2 = df_combined[sym2]
-                coint_score, is_stationary = test_cointegration(prices1, prices2)
+        # Test cointegration for every pair; the tests are independent and
+        # mostly in GIL-releasing NumPy/LAPACK code, so they run on a thread pool
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            coint_results = list(pool.map(
+                lambda pair: test_cointegration(columns[pair[0]], columns[pair[1]]), pairs))
 
-                # Calculate optimal ratio
-                optimal_ratio = calculate_optimal_ratio(prices1, prices2)
-
-                # Calculate half-life if stationary
+        # Analyze all pairs
+        for (sym1, sym2, a, b, correlation), (coint_score, is_stationary) in zip(pairs, coint_results):
+            prices1 = columns[sym1]
+            prices2 = columns[sym2]
+
+            # Calculate optimal ratio (1.0 if sym2 has no variance)
+            optimal_ratio = float(hedge_ratios[a, b]) if variances[b] > 0 else 1.0
+
+            # Calculate half-life if stationary
+            if is_stationary:
+                spread = prices1 - optimal_ratio * prices2
+                half_life = calculate_half_life(spread)
+            else:
+                half_life = None
+
+            # Add to correlation matrix
+            correlation_matrix.append({
+                'symbol1': sym1,
+                'symbol2': sym2,
+                'correlation': round(correlation, 4),
+                'cointegration': round(coint_score, 4)
+            })
+
+            # Score and categorize the pair
+            score = score_pair(correlation, coint_score, is_stationary, half_life)
+
+            # Only suggest pairs with score >= 30
+            if score >= 30:
+                strategy_type = determine_strategy_type(correlation, is_stationary)
+                risk_level = get_risk_level(score)
+
+                # Generate reasoning
+                reasons = []
+                if abs(correlation) > 0.7:
+                    reasons.append(f"{'Strong positive' if correlation > 0 else 'Strong negative'} correlation ({correlation:.2f})")
+                if coint_score > 0.7:
+                    reasons.append(f"High cointegration ({coint_score:.2f})")
                 if is_stationary:
-                    spread = prices1 - optimal_ratio * prices2
-                    half_life = calculate_half_life(spread)
-                else:
-                    half_life = None
+                    reasons.append("Stationary spread suitable for mean reversion")
+                if half_life and 5 <= half_life <= 60:
+                    reasons.append(f"Optimal half-life of {half_life} days")
+
+                reasoning = ". ".join(reasons) if reasons else "Moderate correlation suggests potential for pair trading"
 
-                # Add to correlation matrix
-                correlation_matrix.append({
+                # Calculate expected returns (simplified estimate)
+                # Higher score + lower risk = higher expected returns
+                expected_returns = round(score * 0.15 if risk_level == "Low" else score * 0.10, 2)
+
+                pair_suggestions.append({
                     'symbol1': sym1,
                     'symbol2': sym2,
+                    'score': score,
+                    'recommendationType': strategy_type,
+                    'reasoning': reasoning,
+                    'optimalRatio': round(optimal_ratio, 4),
                     'correlation': round(correlation, 4),
-                    'cointegration': round(coint_score, 4)
+                    'cointegration': round(coint_score, 4),
+                    'halfLife': half_life,
+                    'isStationaryPair': is_stationary,
+                    'expectedReturns': expected_returns,
+                    'riskLevel': risk_level
                 })
 
-                # Score and categorize the pair
-                score = score_pair(correlation, coint_score, is_stationary, half_life)
-
-                # Only suggest pairs with score >= 30
-                if score >= 30:
-                    strategy_type = determine_strategy_type(correlation, is_stationary)
-                    risk_level = get_risk_level(score)
-
-                    # Generate reasoning
-                    reasons = []
-                    if abs(correlation) > 0.7:
-                        reasons.append(f"{'Strong positive' if correlation > 0 else 'Strong negative'} correlation ({correlation:.2f})")
-                    if coint_score > 0.7:
-                        reasons.append(f"High cointegration ({coint_score:.2f})")
-                    if is_stationary:
-                        reasons.append("Stationary spread suitable for mean reversion")
-                    if half_life and 5 <= half_life <= 60:
-                        reasons.append(f"Optimal half-life of {half_life} days")
-
-                    reasoning = ". ".join(reasons) if reasons else "Moderate correlation suggests potential for pair trading"
-
-                    # Calculate expected returns (simplified estimate)
-                    # Higher score + lower risk = higher expected returns
-                    expected_returns = round(score * 0.15 if risk_level == "Low" else score * 0.10, 2)
-
-                    pair_suggestions.append({
-                        'symbol1': sym1,
-                        'symbol2': sym2,
-                        'score': score,
-                        'recommendationType': strategy_type,
-                        'reasoning': reasoning,
-                        'optimalRatio': round(optimal_ratio, 4),
-                        'correlation': round(correlation, 4),
-                        'cointegration': round(coint_score, 4),
-                        'halfLife': half_life,
-                        'isStationaryPair': is_stationary,
-                        'expectedReturns': expected_returns,
-                        'riskLevel': risk_level
-                    })
-
         # Sort suggestions by score (descending)
         pair_suggestions.sort(key=lambda x: x['score'], reverse=True)
 
@@ -283,10 +343,10 @@ def calculate_correlation_matrix(symbols, period='5Y'):
 
 def main():
     if len(sys.argv) < 2:
-        print(json.dumps({
+        write_json({
             'success': False,
             'error': 'Usage: python calculate_correlation_matrix.py <symbols> [period]'
-        }), indent=2)
+        }, pretty=True)
         sys.exit(1)
 
     # Parse symbols (comma-separated)
@@ -298,17 +358,17 @@ def main():
 
     # Validate symbols
     if len(symbols) < 2:
-        print(json.dumps({
+        write_json({
             'success': False,
             'error': 'Need at least 2 commodity symbols'
-        }), indent=2)
+        }, pretty=True)
         sys.exit(1)
 
     # Calculate correlations
     result = calculate_correlation_matrix(symbols, period)
 
     # Output JSON to stdout
-    print(json.dumps(result, indent=2))
+    write_json(result, pretty=True)
 
     # Exit with appropriate code
     sys.exit(0 if result['success'] else 1)
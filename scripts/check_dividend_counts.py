@@ -1,5 +1,11 @@
 import sqlite3
-conn = sqlite3.connect('dividends.db')
+import sys
+# mode=ro: don't create an empty database if it is missing
+conn = sqlite3.connect('file:dividends.db?mode=ro', uri=True)
+conn.execute('PRAGMA query_only=ON')
+# Serve the GROUP BY scans (covered by the Symbol indexes) from memory-mapped pages
+conn.execute('PRAGMA mmap_size=268435456')
+conn.execute('PRAGMA cache_size=-65536')
 c = conn.cursor()
 
 print("Data counts per table:")
@@ -9,15 +15,13 @@ c.execute("SELECT Symbol, COUNT(*) FROM DividendPayments GROUP BY Symbol")
 payments = c.fetchall()
 print(f"\nDividendPayments (by symbol):")
 if payments:
-    for row in payments:
-        print(f"  {row[0]}: {row[1]} payments")
+    sys.stdout.write(''.join(f"  {symbol}: {count} payments\n" for symbol, count in payments))
 else:
     print("  NO DATA - This is why charts are empty!")
 
 c.execute("SELECT Symbol, COUNT(*) FROM YearlyDividends GROUP BY Symbol")
 yearly = c.fetchall()
 print(f"\nYearlyDividends (by symbol):")
-for row in yearly:
-    print(f"  {row[0]}: {row[1]} years")
+sys.stdout.write(''.join(f"  {symbol}: {count} years\n" for symbol, count in yearly))
 
 conn.close()
\ No newline at end of file
@@ -6,13 +6,22 @@ import sqlite3
 import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
+CLEARED_TABLES = ('DividendPayments', 'YearlyDividends', 'DividendModels', 'ApiUsageLogs')
 
 def clear_all_data():
     print("Clearing all dividend data from database...")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH, isolation_level=None)
         cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA busy_timeout=30000')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        # No per-row FK checks; a bare DELETE then takes SQLite's truncate path
+        cursor.execute('PRAGMA foreign_keys=OFF')
+
+        # One write transaction for all four tables -> a single commit
+        cursor.execute('BEGIN IMMEDIATE')
 
         # Delete in correct order (due to foreign keys)
         cursor.execute('DELETE FROM DividendPayments')
@@ -27,7 +36,21 @@ def clear_all_data():
         cursor.execute('DELETE FROM ApiUsageLogs')
         logs_deleted = cursor.rowcount
 
-        conn.commit()
+        # Restart AUTOINCREMENT ids for the emptied tables
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'")
+        if cursor.fetchone():
+            cursor.execute(
+                f"DELETE FROM sqlite_sequence WHERE name IN ({','.join('?' * len(CLEARED_TABLES))})",
+                CLEARED_TABLES)
+
+        cursor.execute('COMMIT')
+
+        # Return the freed pages to the file system (must run outside a transaction).
+        # The deletes are already committed, so a failure here is only a warning
+        try:
+            cursor.execute('VACUUM')
+        except sqlite3.Error as e:
+            print(f"WARNING: VACUUM failed, the file keeps its free pages: {e}")
 
         print(f"✓ Deleted {stocks_deleted} stocks")
         print(f"✓ Deleted {payments_deleted} dividend payments")
@@ -7,28 +7,23 @@ Example: python fetch_commodity_data.py GC=F 5
 """
 
 import sys
-import json
 import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-
-def calculate_atr(df, period=14):
-    """Calculate Average True Range (ATR)"""
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift())
-    low_close = np.abs(df['Low'] - df['Close'].shift())
-
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(period).mean()
-
-    return atr
+from indicators import calculate_atr
+from json_output import write_json
+from price_cache import load_history
 
 def calculate_volatility(df, period=20):
     """Calculate historical volatility (annualized)"""
-    log_returns = np.log(df['Close'] / df['Close'].shift(1))
-    volatility = log_returns.rolling(period).std() * np.sqrt(252) * 100  # Annualized %
+    close = df['Close'].to_numpy(dtype=np.float64)
+    log_returns = np.empty_like(close)
+    log_returns[:1] = np.nan
+    np.log(close[1:] / close[:-1], out=log_returns[1:])
+    volatility = pd.Series(log_returns, index=df.index).rolling(period).std()
+    volatility *= np.sqrt(252)
+    volatility *= 100  # Annualized %
     return volatility
 
 def get_commodity_specs(symbol):
@@ -101,6 +96,11 @@ def get_commodity_specs(symbol):
         'marginRequirement': 5000
     })
 
+def _nanmean(values):
+    """Mean of the non-NaN values (NaN if there are none), without a warning"""
+    valid = values[~np.isnan(values)]
+    return valid.mean() if valid.size else float('nan')
+
 def fetch_commodity_data(symbol, years=5):
     """
     Fetch commodity futures data from Yahoo Finance
@@ -121,7 +121,7 @@ def fetch_commodity_data(symbol, years=5):
 
         # Fetch data from Yahoo Finance
         ticker = yf.Ticker(symbol)
-        df = ticker.history(start=start_date, end=end_date)
+        df = load_history(ticker, start_date, end_date)
 
         if df.empty:
             return {
@@ -139,22 +139,41 @@ def fetch_commodity_data(symbol, years=5):
         # Get commodity specifications
         specs = get_commodity_specs(symbol)
 
+        # Columns used by both the history rows and the summary log, extracted once
+        closes = df['Close'].to_numpy(dtype=np.float64)
+        atr14 = df['ATR14'].to_numpy(dtype=np.float64)
+        volatility20 = df['Volatility20'].to_numpy(dtype=np.float64)
+
         # Get current price (most recent close)
-        current_price = float(df['Close'].iloc[-1])
-
-        # Prepare history data
-        history = []
-        for date, row in df.iterrows():
-            history.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume']) if not pd.isna(row['Volume']) else 0,
-                'atr14': float(row['ATR14']) if not pd.isna(row['ATR14']) else None,
-                'volatility20': float(row['Volatility20']) if not pd.isna(row['Volatility20']) else None
-            })
+        current_price = float(closes[-1])
+
+        # Prepare history data (each column converted once, then zipped into rows)
+        def column(name):
+            return df[name].to_numpy(dtype=np.float64).tolist()
+
+        def nullable_column(values):
+            # NaN -> None via one vectorized mask instead of a per-row check
+            out = values.astype(object)
+            out[np.isnan(values)] = None
+            return out.tolist()
+
+        history = [
+            {
+                'date': date,
+                'open': open_,
+                'high': high,
+                'low': low,
+                'close': close,
+                'volume': volume,
+                'atr14': atr,
+                'volatility20': vol
+            }
+            for date, open_, high, low, close, volume, atr, vol in zip(
+                df.index.strftime('%Y-%m-%d').tolist(),
+                column('Open'), column('High'), column('Low'), closes.tolist(),
+                df['Volume'].fillna(0).astype(np.int64).tolist(),
+                nullable_column(atr14), nullable_column(volatility20))
+        ]
 
         # Build response
         response = {
@@ -176,10 +195,10 @@ def fetch_commodity_data(symbol, years=5):
         }
 
         sys.stderr.write(f"Successfully fetched data for {symbol}\n")
-        sys.stderr.write(f"Price range: ${df['Close'].min():.2f} - ${df['Close'].max():.2f}\n")
+        sys.stderr.write(f"Price range: ${np.nanmin(closes):.2f} - ${np.nanmax(closes):.2f}\n")
         sys.stderr.write(f"Current price: ${current_price:.2f}\n")
-        sys.stderr.write(f"Average ATR(14): ${df['ATR14'].mean():.2f}\n")
-        sys.stderr.write(f"Average Volatility(20): {df['Volatility20'].mean():.2f}%\n")
+        sys.stderr.write(f"Average ATR(14): ${_nanmean(atr14):.2f}\n")
+        sys.stderr.write(f"Average Volatility(20): {_nanmean(volatility20):.2f}%\n")
 
         return response
 
@@ -192,10 +211,10 @@ def fetch_commodity_data(symbol, years=5):
 
 def main():
     if len(sys.argv) < 2:
-        print(json.dumps({
+        write_json({
             'success': False,
             'error': 'Usage: python fetch_commodity_data.py <symbol> [years]'
-        }), indent=2)
+        }, pretty=True)
         sys.exit(1)
 
     symbol = sys.argv[1].upper()
@@ -203,17 +222,17 @@ def main():
 
     # Validate years
     if years < 1 or years > 20:
-        print(json.dumps({
+        write_json({
             'success': False,
             'error': 'Years must be between 1 and 20'
-        }), indent=2)
+        }, pretty=True)
         sys.exit(1)
 
     # Fetch data
     result = fetch_commodity_data(symbol, years)
 
     # Output JSON to stdout
-    print(json.dumps(result, indent=2))
+    write_json(result)
 
     # Exit with appropriate code
     sys.exit(0 if result['success'] else 1)
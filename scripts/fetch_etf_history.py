@@ -6,9 +6,11 @@ Example: python fetch_etf_history.py XEG.TO 5
 """
 
 import sys
-import json
 import yfinance as yf
+import numpy as np
 from datetime import datetime, timedelta
+from json_output import write_json
+from price_cache import load_history
 
 def log(message):
     """Print to stderr for logging"""
@@ -31,7 +33,7 @@ def fetch_etf_history(symbol, years=5):
         log(f"Date Range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
 
         # Fetch historical data
-        hist = ticker.history(start=start_date, end=end_date)
+        hist = load_history(ticker, start_date, end_date)
 
         if hist.empty:
             log(f"✗ No historical data found for {symbol}")
@@ -46,86 +48,70 @@ def fetch_etf_history(symbol, years=5):
         log(f"✓ Name: {name}")
         log(f"✓ Currency: {currency}")
 
-        # Prepare data for JSON output
-        history_data = []
-        for date, row in hist.iterrows():
-            history_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume']),
-                'adjClose': float(row['Close'])  # Using Close as adjusted close
-            })
+        # Prepare data for JSON output (each column converted once, then zipped into rows)
+        def column(name):
+            return hist[name].to_numpy(dtype=np.float64).tolist()
+
+        history_data = [
+            {
+                'date': date,
+                'open': open_,
+                'high': high,
+                'low': low,
+                'close': close,
+                'volume': volume,
+                'adjClose': close  # Using Close as adjusted close
+            }
+            for date, open_, high, low, close, volume in zip(
+                hist.index.strftime('%Y-%m-%d').tolist(),
+                column('Open'), column('High'), column('Low'), column('Close'),
+                hist['Volume'].astype(np.int64).tolist())
+        ]
 
         # Calculate performance metrics
         first_price = history_data[0]['close']
         last_price = history_data[-1]['close']
         total_return = ((last_price - first_price) / first_price) * 100
 
-        # Calculate yearly returns
-        yearly_returns = []
-        current_year = None
-        year_start_price = None
-        year_end_price = None
-
-        for record in history_data:
-            year = record['date'][:4]
-            if current_year != year:
-                if current_year is not None and year_start_price is not None:
-                    yearly_return = ((year_end_price - year_start_price) / year_start_price) * 100
-                    yearly_returns.append({
-                        'year': int(current_year),
-                        'return': round(yearly_return, 2)
-                    })
-                current_year = year
-                year_start_price = record['close']
-            year_end_price = record['close']
-
-        # Add last year
-        if current_year is not None and year_start_price is not None:
-            yearly_return = ((year_end_price - year_start_price) / year_start_price) * 100
-            yearly_returns.append({
-                'year': int(current_year),
-                'return': round(yearly_return, 2)
-            })
-
-        # Calculate consolidated monthly data (average by calendar month)
-        from collections import defaultdict
-        monthly_groups = defaultdict(list)
-
-        # Calculate monthly returns
-        for i in range(1, len(history_data)):
-            prev_close = history_data[i-1]['close']
-            curr_close = history_data[i]['close']
-            monthly_return = ((curr_close - prev_close) / prev_close) * 100
-
-            # Get month name from date
-            date_obj = datetime.strptime(history_data[i]['date'], '%Y-%m-%d')
-            month_name = date_obj.strftime('%B')  # Full month name (January, February, etc.)
-
-            monthly_groups[month_name].append(monthly_return)
-
-        # Calculate statistics for each month
+        # Calculate yearly returns (first to last close of each calendar year;
+        # a year starts wherever the year changes between consecutive rows)
+        closes = hist['Close'].to_numpy(dtype=np.float64)
+        row_years = hist.index.year.to_numpy()
+        year_starts = np.flatnonzero(np.r_[True, row_years[1:] != row_years[:-1]])
+        year_ends = np.r_[year_starts[1:] - 1, len(row_years) - 1]
+        year_start_prices = closes[year_starts]
+        year_returns = (closes[year_ends] - year_start_prices) / year_start_prices * 100
+        yearly_returns = [
+            {'year': year, 'return': round(yearly_return, 2)}
+            for year, yearly_return in zip(row_years[year_starts].tolist(), year_returns.tolist())
+        ]
+
+        # Calculate consolidated monthly data (average by calendar month) from
+        # day-over-day returns, bucketed by the month of the later day
         month_order = ['January', 'February', 'March', 'April', 'May', 'June',
                       'July', 'August', 'September', 'October', 'November', 'December']
 
+        daily_returns = ((closes[1:] - closes[:-1]) / closes[:-1]) * 100
+        months = hist.index.month.to_numpy()[1:]
+        occurrences_by_month = np.bincount(months, minlength=13).tolist()
+        # bincount sums in row order, so the totals match a sequential sum()
+        total_by_month = np.bincount(months, weights=daily_returns, minlength=13).tolist()
+        positive_by_month = np.bincount(months[daily_returns > 0], minlength=13).tolist()
+        negative_by_month = np.bincount(months[daily_returns < 0], minlength=13).tolist()
+
         consolidated_monthly_data = []
-        for month_name in month_order:
-            if month_name in monthly_groups and len(monthly_groups[month_name]) > 0:
-                returns = monthly_groups[month_name]
-                avg_growth = sum(returns) / len(returns)
-                positive_count = sum(1 for r in returns if r > 0)
-                negative_count = sum(1 for r in returns if r < 0)
-                occurrences = len(returns)
-                positive_percentage = round((positive_count / occurrences) * 100, 1) if occurrences > 0 else 0
+        for month, month_name in enumerate(month_order, start=1):
+            occurrences = occurrences_by_month[month]
+            if occurrences > 0:
+                avg_growth = total_by_month[month] / occurrences
+                positive_count = positive_by_month[month]
+                positive_percentage = round((positive_count / occurrences) * 100, 1)
 
                 consolidated_monthly_data.append({
                     'month': month_name,
                     'avgGrowth': round(avg_growth, 2),
                     'positiveCount': positive_count,
-                    'negativeCount': negative_count,
+                    'negativeCount': negative_by_month[month],
                     'occurrences': occurrences,
                     'positivePercentage': positive_percentage
                 })
@@ -180,6 +166,6 @@ if __name__ == '__main__':
 
     if result:
         # Output JSON to stdout
-        print(json.dumps(result, indent=2))
+        write_json(result)
     else:
         sys.exit(1)
\ No newline at end of file
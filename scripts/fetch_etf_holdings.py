@@ -5,13 +5,27 @@ Fetches ETF information from Yahoo Finance and holdings from web scraping
 
 import sys
 import yfinance as yf
+import pandas as pd
 import sqlite3
 import json
 from datetime import datetime
 import os
-import requests
-from bs4 import BeautifulSoup
+from http_session import make_session
+from bs4 import BeautifulSoup, SoupStrainer
 import time
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent Yahoo price lookups for an ETF's holdings
+MAX_PRICE_WORKERS = 10
+
+# libxml2-backed parser when lxml is installed (it is in requirements.txt)
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+# The scrapers only read holdings tables, so only <table> subtrees are built
+TABLES_ONLY = SoupStrainer('table')
+
+# One session for the etfdb and Yahoo scrapers
+SESSION = make_session(pool_connections=10, pool_maxsize=20, retries=2)
 
 # Helper function to print to stderr (so it doesn't interfere with JSON output to stdout)
 def log(message):
@@ -40,14 +54,13 @@ def fetch_stock_price_data(symbol):
         except Exception as e:
             log(f"Info method failed for {symbol}, trying history: {e}")
 
-        # Fallback to history if info fails
-        hist = stock.history(period='1d')
+        # Fallback to history if info fails; the previous close comes from the
+        # same few days of bars rather than a second .info round-trip
+        closes = stock.history(period='5d')['Close'].dropna()
 
-        if not hist.empty:
-            current_price = hist['Close'].iloc[-1]
-            # Get previous close from the ticker info
-            ticker_info = stock.info
-            previous_close = ticker_info.get('previousClose', current_price)
+        if not closes.empty:
+            current_price = float(closes.iloc[-1])
+            previous_close = float(closes.iloc[-2]) if len(closes) >= 2 else current_price
 
             price_change = current_price - previous_close
             percent_change = (price_change / previous_close) * 100
@@ -64,11 +77,63 @@ def fetch_stock_price_data(symbol):
         log(f"Error fetching price data for {symbol}: {e}")
         return None
 
+def fetch_price_data_batch(symbols):
+    """
+    Fetch current price data for many symbols from one multi-ticker download of
+    recent daily bars (last close vs the one before), without a per-symbol
+    .info request. Returns {symbol: price data}; symbols without two closes are left out
+    """
+    prices = {}
+    if not symbols:
+        return prices
+
+    try:
+        data = yf.download(symbols, period='5d', interval='1d', group_by='ticker',
+                           auto_adjust=False, threads=True, progress=False)
+    except Exception as e:
+        log(f"Batch price download failed: {e}")
+        return prices
+
+    if data.empty:
+        return prices
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({symbols[0]: data}, axis=1)
+    fetched = set(data.columns.get_level_values(0))
+
+    for symbol in symbols:
+        if symbol not in fetched:
+            continue
+        closes = data[symbol]['Close'].dropna().to_numpy()
+        if len(closes) < 2 or not closes[-2]:
+            continue
+
+        current_price = float(closes[-1])
+        previous_close = float(closes[-2])
+        price_change = current_price - previous_close
+        percent_change = (price_change / previous_close) * 100
+
+        prices[symbol] = {
+            'currentPrice': round(current_price, 2),
+            'priceChange': round(price_change, 2),
+            'percentChange': round(percent_change, 2)
+        }
+
+    return prices
+
 def connect_db():
     """Connect to the SQLite database"""
     db_path = os.path.join(os.path.dirname(__file__), '..', 'dividends.db')
     return sqlite3.connect(db_path)
 
+def _parse_weight(text):
+    """Percentage in a holdings cell such as '5.12%' or '1,234.5 %' (None if there isn't one)"""
+    if '%' not in text:
+        return None
+    try:
+        return float(text.replace('%', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
 def fetch_holdings_from_etfdb(symbol):
     """Scrape holdings data from etfdb.com"""
     holdings = []
@@ -86,54 +151,37 @@ def fetch_holdings_from_etfdb(symbol):
         }
 
         log(f"Fetching holdings from etfdb.com for {scrape_symbol}...")
-        response = requests.get(url, headers=headers, timeout=15)
+        response = SESSION.get(url, headers=headers, timeout=15)
 
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=TABLES_ONLY)
 
-            # Find all tables on the page
-            tables = soup.find_all('table')
+            for table in soup.find_all('table'):
+                # Header row plus the top 20; find_all stops walking the table there
+                for row in table.find_all('tr', limit=21)[1:]:
+                    cols = row.find_all('td')
+                    if len(cols) < 2:
+                        continue
 
-            for table in tables:
-                rows = table.find_all('tr')
+                    # Each cell's text is extracted once
+                    texts = [col.text.strip() for col in cols]
 
-                for row in rows[1:21]:  # Skip header, get top 20
-                    cols = row.find_all('td')
-                    if len(cols) >= 2:
-                        # Try multiple column layouts
-                        ticker = ''
-                        name = ''
-                        weight = 0
-
-                        # Extract ticker (could be in link or plain text)
-                        ticker_elem = cols[0].find('a')
-                        if ticker_elem:
-                            ticker = ticker_elem.text.strip()
-                        else:
-                            ticker = cols[0].text.strip()
-
-                        # Extract name
-                        if len(cols) > 1:
-                            name = cols[1].text.strip()
-
-                        # Extract weight (look for % symbol in any column)
-                        for col in cols:
-                            text = col.text.strip()
-                            if '%' in text:
-                                try:
-                                    weight = float(text.replace('%', '').replace(',', '').strip())
-                                    break
-                                except:
-                                    continue
+                    # Extract ticker (could be in link or plain text)
+                    ticker_elem = cols[0].find('a')
+                    ticker = ticker_elem.text.strip() if ticker_elem else texts[0]
+                    name = texts[1]
 
-                        # Only add if we have valid data
-                        if ticker and weight > 0 and len(ticker) <= 10:
-                            holdings.append({
-                                'symbol': ticker.upper(),
-                                'name': name if name else ticker,
-                                'weight': weight,
-                                'sector': 'Unknown'
-                            })
+                    # Weight: the first cell holding a parseable percentage
+                    weight = next((w for w in map(_parse_weight, texts) if w is not None), 0)
+
+                    # Only add if we have valid data
+                    if ticker and weight > 0 and len(ticker) <= 10:
+                        holdings.append({
+                            'symbol': ticker.upper(),
+                            'name': name if name else ticker,
+                            'weight': weight,
+                            'sector': 'Unknown'
+                        })
 
                 # If we found holdings in this table, stop searching
                 if holdings:
@@ -165,10 +213,10 @@ def fetch_holdings_from_yahoo_finance_web(symbol):
         }
 
         log(f"Fetching holdings from Yahoo Finance web for {scrape_symbol}...")
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SESSION.get(url, headers=headers, timeout=10)
 
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=TABLES_ONLY)
 
             # Look for holdings data in various formats
             # Yahoo Finance uses different HTML structures, so we try multiple approaches
@@ -275,10 +323,20 @@ def fetch_etf_data(symbol):
         # Fetch price data for each holding
         if holdings:
             log(f"Fetching price data for {len(holdings)} holdings...")
+            stock_symbols = list(dict.fromkeys(h['symbol'] for h in holdings if h.get('symbol')))
+            price_by_symbol = fetch_price_data_batch(stock_symbols)
+
+            # Symbols the batch download could not price fall back to per-symbol
+            # lookups; each blocks on Yahoo, so run them concurrently
+            missing = [s for s in stock_symbols if s not in price_by_symbol]
+            if missing:
+                with ThreadPoolExecutor(max_workers=MAX_PRICE_WORKERS) as pool:
+                    price_by_symbol.update(zip(missing, pool.map(fetch_stock_price_data, missing)))
+
             for holding in holdings:
                 stock_symbol = holding.get('symbol')
                 if stock_symbol:
-                    price_data = fetch_stock_price_data(stock_symbol)
+                    price_data = price_by_symbol[stock_symbol]
                     if price_data:
                         holding['currentPrice'] = price_data['currentPrice']
                         holding['priceChange'] = price_data['priceChange']
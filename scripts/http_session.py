@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP session setup for the bulk import and scraper scripts
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_session(pool_connections=16, pool_maxsize=16, retries=3):
+    """
+    Keep-alive requests.Session with pooled connections, so repeated calls
+    reuse a connection instead of a new TCP+TLS handshake each; transient
+    gateway errors (502/503/504) are retried with backoff
+    """
+    session = requests.Session()
+    session.headers['Connection'] = 'keep-alive'
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                                            raise_on_status=False))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
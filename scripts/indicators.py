@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Technical indicators shared by the commodity fetch and backtest scripts, so
+the stored ATR and the ATR the backtests trade on come from one implementation
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional: without it njit is a no-op and the kernels here and in
+    # the scripts importing it run as plain Python/NumPy
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+@njit(cache=True)
+def _fmax(a, b):
+    """max(a, b) ignoring a NaN operand (np.fmax for scalars)"""
+    return b if a != a or b > a else a
+
+@njit(cache=True)
+def _atr_wilder(high, low, close, period):
+    """
+    True range and Wilder's ATR in one pass. The first ATR (bar period-1) is the
+    mean of the first `period` true ranges, then atr = (prev * (period-1) + tr) / period.
+    The first bar's true range is high-low; a NaN true range repeats the previous ATR
+    """
+    n = high.shape[0]
+    atr = np.full(n, np.nan)
+    total = 0.0
+    count = 0
+    prev = np.nan
+    for i in range(n):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = _fmax(tr, _fmax(abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+
+        if i < period:
+            if tr == tr:
+                total += tr
+                count += 1
+            if i == period - 1 and count > 0:
+                prev = total / count
+                atr[i] = prev
+        else:
+            if tr == tr:
+                prev = (prev * (period - 1) + tr) / period
+            atr[i] = prev
+    return atr
+
+def calculate_atr(df, period=14):
+    """Calculate Average True Range (ATR, Wilder's smoothing)"""
+    atr = _atr_wilder(df['High'].to_numpy(dtype=np.float64), df['Low'].to_numpy(dtype=np.float64),
+                      df['Close'].to_numpy(dtype=np.float64), period)
+    return pd.Series(atr, index=df.index)
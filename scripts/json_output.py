@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+JSON output shared by the scripts the API shells out to
+"""
+
+import sys
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def write_json(obj, pretty=False):
+    """
+    Print obj as JSON to stdout (orjson when installed, else json). Compact by
+    default; indented when pretty
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(obj, option=option) + b'\n')
+        sys.stdout.buffer.flush()
+    elif pretty:
+        print(json.dumps(obj, indent=2))
+    else:
+        print(json.dumps(obj, separators=(',', ':')))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Local price-history cache shared by the backtest, correlation and fetch scripts,
+so repeated runs over the same window don't re-download from Yahoo.
+
+One file per (symbol, start day, end day). Entries older than PRICE_CACHE_TTL
+seconds are refetched, since the window usually ends today.
+Set PRICE_CACHE_DIR to an empty string to disable the cache.
+"""
+
+import os
+import sys
+import time
+import importlib.util
+import pandas as pd
+
+PRICE_CACHE_DIR = os.environ.get(
+    'PRICE_CACHE_DIR', os.path.join(os.path.dirname(__file__), '..', 'cache', 'prices'))
+PRICE_CACHE_TTL = float(os.environ.get('PRICE_CACHE_TTL', 3600))
+# Parquet needs pyarrow or fastparquet; fall back to pickle without them
+_CACHE_PARQUET = any(importlib.util.find_spec(m) for m in ('pyarrow', 'fastparquet'))
+
+def cache_path(symbol, start_date, end_date, suffix=''):
+    """Cache file for symbol over [start_date, end_date]; suffix keeps other layouts apart"""
+    ext = 'parquet' if _CACHE_PARQUET else 'pkl'
+    safe_symbol = ''.join(c if c.isalnum() else '_' for c in symbol)
+    return os.path.join(PRICE_CACHE_DIR, f'{safe_symbol}_{start_date:%Y%m%d}_{end_date:%Y%m%d}{suffix}.{ext}')
+
+def read_cache(path):
+    """Cached DataFrame at path, or None if it is missing, expired or unreadable"""
+    try:
+        if time.time() - os.path.getmtime(path) < PRICE_CACHE_TTL:
+            return pd.read_parquet(path) if _CACHE_PARQUET else pd.read_pickle(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        sys.stderr.write(f"Ignoring unreadable price cache {path}: {e}\n")
+    return None
+
+def write_cache(path, df):
+    """Store df at path; failures are reported and never fail the fetch"""
+    # Write then rename, so a concurrent run never reads a partial file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+        if _CACHE_PARQUET:
+            df.to_parquet(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        # Engine errors (ValueError, ImportError, PicklingError...) as well as OSError
+        sys.stderr.write(f"Could not write price cache {path}: {e}\n")
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def load_history(ticker, start_date, end_date):
+    """Daily OHLCV history for a yf.Ticker, read through the cache"""
+    if not PRICE_CACHE_DIR:
+        return ticker.history(start=start_date, end=end_date)
+
+    path = cache_path(ticker.ticker, start_date, end_date)
+    df = read_cache(path)
+    if df is not None:
+        return df
+
+    df = ticker.history(start=start_date, end=end_date)
+    if not df.empty:
+        write_cache(path, df)
+    return df
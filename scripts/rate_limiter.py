@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Shared request pacing and worker pool for the bulk import scripts
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RateLimiter:
+    """Space out calls across threads to at most one per `interval` seconds"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self, cost=1):
+        """Block until this call's slot; `cost` calls' worth of spacing is reserved"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval * cost
+        if start > now:
+            time.sleep(start - now)
+
+
+class ImportExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that drops queued requests instead of draining them on Ctrl+C"""
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and issubclass(exc_type, KeyboardInterrupt):
+            self.shutdown(wait=False, cancel_futures=True)
+            return False
+        return super().__exit__(exc_type, exc_val, exc_tb)
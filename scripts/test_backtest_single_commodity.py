@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the backtest --batch path, on a stubbed price frame (no network)
+
+Usage: python -m pytest scripts/test_backtest_single_commodity.py
+"""
+
+import numpy as np
+import pandas as pd
+
+import backtest_single_commodity
+
+
+def _stub_prices(symbol, start_date, end_date):
+    """Two years of synthetic daily OHLCV bars"""
+    rng = np.random.default_rng(0)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.01, 504)))
+    index = pd.bdate_range('2024-01-01', periods=len(close))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                         'Close': close, 'Volume': 1.0}, index=index)
+
+
+def test_run_batch_single_config(monkeypatch):
+    monkeypatch.setattr(backtest_single_commodity, 'load_prices', _stub_prices)
+
+    results = backtest_single_commodity.run_batch([{
+        'symbol': 'gc=f', 'strategy': 'RSI', 'capital': 10000, 'years': 2,
+        'stopLossMethod': 'ATR', 'stopLossValue': 2.0,
+    }])
+
+    assert len(results) == 1
+    result = results[0]
+    assert result['success'], result.get('error')
+    assert result['symbol'] == 'GC=F'
+    assert result['strategyType'] == 'rsi'
+    assert result['totalTrades'] == sum(1 for t in result['trades'] if t['pnl'] is not None)